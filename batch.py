@@ -0,0 +1,207 @@
+"""
+Batch replay and validation of PGN game corpora on a pool of processes.
+The file is cut into shards at game boundaries, every worker reads and replays the games of its shards through the
+gameplay rules, and only counters travel back to be merged.
+Usage from the project root: python batch.py games.pgn --workers 4
+"""
+
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+import fen
+import gameplay as gpl
+import pgn
+
+
+# End of game result of is_checkmate_stalemate: result tag it implies.
+END_RESULTS = {"w": "0-1", "b": "1-0", "stalemate": "1/2-1/2"}
+# Result of is_draw or is_insufficient_material: statistics key of the games that reached it.
+DRAW_STATISTICS = {
+    "repetition": "repetition draws", "fifty_moves": "fifty-move draws",
+    "insufficient_material": "material draws"
+}
+ERROR_SAMPLES = 5
+
+
+def find_shards(path, count):
+    """
+    Cuts a PGN file into about count byte ranges, each starting at the first tag line of a game.
+    :param path: String
+    :param count: Integer
+    :return: List of (start, end) offsets
+    """
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as file:
+        for index in range(1, count):
+            file.seek(max(starts[-1], size * index // count))
+            file.readline()
+            previous_is_tag = True
+            while True:
+                offset = file.tell()
+                line = file.readline()
+                if not line:
+                    break
+                is_tag = line.startswith(b"[")
+                if is_tag and not previous_is_tag:
+                    if offset > starts[-1]:
+                        starts.append(offset)
+                    break
+                if line.strip():
+                    previous_is_tag = is_tag
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def read_shard(path, start, end):
+    """
+    Yields the lines of a byte range of a file.
+    :param path: String
+    :param start: Integer
+    :param end: Integer
+    :return: Generator of strings
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                break
+            yield line.decode("utf-8", errors="replace")
+
+
+def replay_game(game, chessboard, statistics):
+    """
+    Replays a game read by pgn.read_games, testing for check, checkmate, stalemate and draws after every move, and
+    counts the outcome in the statistics. Over the board these draws have to be claimed and games often go on past
+    them, so a draw is only counted and does not have to match the result.
+    :param game: Dict
+    :param chessboard: board.Chessboard, reused
+    :param statistics: Counter
+    :return: String, the error of the game or None
+    """
+    sans, result = pgn.tokenize_movetext(game["movetext"])
+    result = result or game["tags"].get("Result", "*")
+    statistics["games"] += 1
+    statistics["result " + result] += 1
+    chessboard, team = fen.load_fen(game["tags"].get("FEN", fen.STARTING_FEN), chessboard)
+
+    end = draw = False
+    for ply, san in enumerate(sans):
+        if end:
+            return "ply {}: move {} after the game ended".format(ply + 1, san)
+        try:
+            move = pgn.resolve_san(chessboard, team, san)
+        except ValueError as exception:
+            return "ply {}: {}".format(ply + 1, exception)
+        gpl.make_move(chessboard, move)
+        team = gpl.switch_active_team(team)
+        statistics["plies"] += 1
+        if gpl.is_king_under_check(chessboard, team):
+            statistics["checks"] += 1
+        end = gpl.is_checkmate_stalemate(chessboard, team)
+        draw = draw or gpl.is_insufficient_material(chessboard) or gpl.is_draw(chessboard)
+
+    if draw:
+        statistics[DRAW_STATISTICS[draw]] += 1
+    if end:
+        statistics["checkmates" if end in ["w", "b"] else "stalemates"] += 1
+        if result != "*" and result != END_RESULTS[end]:
+            statistics["result mismatches"] += 1
+    return None
+
+
+def replay_shard(task):
+    """
+    Replays the games of one shard of a PGN file.
+    :param task: Tuple of the path and the start and end offsets
+    :return: Tuple of the statistics Counter and a few sample errors
+    """
+    path, start, end = task
+    statistics = Counter()
+    errors = []
+    chessboard = fen.load_fen(fen.STARTING_FEN)[0]
+    for game in pgn.read_games(read_shard(path, start, end)):
+        try:
+            error = replay_game(game, chessboard, statistics)
+        except ValueError as exception:
+            error = str(exception)
+        if error is not None:
+            statistics["illegal games"] += 1
+            if len(errors) < ERROR_SAMPLES:
+                errors.append("{} - {}: {}".format(
+                    game["tags"].get("White", "?"), game["tags"].get("Black", "?"), error
+                ))
+    return statistics, errors
+
+
+def run(path, workers, shards=None, progress=True):
+    """
+    Replays all games of a PGN file on a pool of worker processes and merges their statistics.
+    One worker replays the shards in this process.
+    :param path: String
+    :param workers: Integer
+    :param shards: Integer, number of shards, four per worker by default
+    :param progress: Bool, report every finished shard on stderr
+    :return: Tuple of the merged statistics Counter, the sample errors and the elapsed seconds
+    """
+    start = time.perf_counter()
+    tasks = [(path, first, last) for first, last in find_shards(path, shards or 4 * workers)]
+    statistics = Counter()
+    errors = []
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(replay_shard, tasks) if pool else map(replay_shard, tasks)
+        for done, (shard_statistics, shard_errors) in enumerate(results, 1):
+            statistics.update(shard_statistics)
+            errors.extend(shard_errors)
+            if progress:
+                elapsed = time.perf_counter() - start
+                print("\rshard {}/{}: {} games, {:.0f} games/s".format(
+                    done, len(tasks), statistics["games"], statistics["games"] / elapsed if elapsed else 0
+                ), end="", file=sys.stderr, flush=True)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    if progress:
+        print(file=sys.stderr)
+    return statistics, errors, time.perf_counter() - start
+
+
+def print_statistics(statistics, errors, elapsed):
+    """
+    Prints the merged statistics, the sample errors and the throughput.
+    :param statistics: Counter
+    :param errors: List
+    :param elapsed: Float
+    :return: None
+    """
+    for key in sorted(statistics):
+        print("{:20s} {:10d}".format(key, statistics[key]))
+    for error in errors:
+        print("illegal: " + error)
+    print("{:.2f} s: {:.0f} games/s, {:.0f} plies/s".format(
+        elapsed, statistics["games"] / elapsed if elapsed else 0, statistics["plies"] / elapsed if elapsed else 0
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="PGN file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--shards", type=int, help="number of shards, four per worker by default")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args()
+
+    statistics, errors, elapsed = run(args.path, max(1, args.workers), args.shards, not args.quiet)
+    print_statistics(statistics, errors, elapsed)
+    sys.exit(1 if statistics["illegal games"] else 0)
+
+
+if __name__ == '__main__':
+    main()
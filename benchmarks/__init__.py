@@ -0,0 +1,3 @@
+"""
+Benchmarks for the rules core and the gui. Run them from the project root, e.g. python -m benchmarks.import_time
+"""
@@ -0,0 +1,43 @@
+"""
+Microbenchmark of the walks over the precomputed attack and ray tables on the perft test positions.
+Times check detection, the legality information (checkers, pins and attacked squares) and full legal move generation.
+"""
+
+
+import argparse
+import time
+import gameplay as gpl
+import perft
+
+
+def measure(function, repeats):
+    """
+    Returns the number of calls per second of a function.
+    :param function: Function without arguments
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return repeats / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("{:12s} {:>16s} {:>16s} {:>16s}".format("position", "king check", "legality", "legal moves"))
+    for name, position in perft.POSITIONS.items():
+        chessboard, team = perft.setup_chessboard(position)
+        print("{:12s} {:12.0f} /s {:12.0f} /s {:12.0f} /s".format(
+            name,
+            measure(lambda: gpl.is_king_under_check(chessboard, team), args.repeats),
+            measure(lambda: gpl.get_legality(chessboard, team), args.repeats),
+            measure(lambda: gpl.generate_legal_moves(chessboard, team), args.repeats)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Scaling of the batch replay over the number of worker processes.
+A PGN file of random games is replayed with 1 up to the given number of workers and the speedup over one worker is
+printed for each.
+"""
+
+
+import argparse
+import os
+import tempfile
+import batch
+from benchmarks import pgn_throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="largest number of workers")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "games.pgn")
+    pgn_throughput.write_games(path, args.games, args.seed)
+
+    print("{} cores, {} games".format(os.cpu_count(), args.games))
+    print("{:>8s} {:>10s} {:>10s} {:>8s}".format("workers", "games/s", "plies/s", "speedup"))
+    single = None
+    for workers in range(1, args.workers + 1):
+        statistics, _, elapsed = batch.run(path, workers, progress=False)
+        rate = statistics["games"] / elapsed
+        single = single or rate
+        print("{:8d} {:10.0f} {:10.0f} {:7.2f}x".format(workers, rate, statistics["plies"] / elapsed, rate / single))
+
+    os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Compares how many positions per second the chessboard dictionary and the bitboard backend can analyse.
+Analysing a position means finding every legal move of the side to move and whether its king is under check.
+The baseline is the chessboard dictionary of gameplay.py, generate_legal_moves and is_king_under_check on the same
+positions, and the bitboard backend is expected to be at least ten times faster.
+"""
+
+
+import argparse
+import time
+import bitboard
+import board as brd
+import gameplay as gpl
+
+
+OPENING_LINES = [
+    [],
+    ["e2e4", "e7e5", "g1f3", "b8c6", "f1c4", "f8c5"],
+    ["d2d4", "d7d5", "c2c4", "e7e6", "b1c3", "g8f6", "c1g5", "f8e7"],
+    ["e2e4", "c7c5", "g1f3", "d7d6", "d2d4", "c5d4", "f3d4", "g8f6", "b1c3", "a7a6"],
+    ["e2e4", "e7e5", "d1h5", "b8c6", "f1c4", "g8f6"],
+]
+
+
+def play_line(line):
+    """
+    Plays a list of moves written as source and destination square names from the starting position.
+    :param line: List
+    :return: Tuple
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    team = "w"
+    for move in line:
+        source, destination = brd.square_from_name(move[:2]), brd.square_from_name(move[2:])
+        gpl.highlight_potential_moves(chessboard, source, team)
+        gpl.do_move(chessboard, source, destination)
+        gpl.clear_selection_highlight(chessboard)
+        team = gpl.switch_active_team(team)
+    return chessboard, team
+
+
+def analyse_chessboard(chessboard, team):
+    """
+    Counts the legal moves of a team on the chessboard dictionary and tests its king for check.
+    :param chessboard: Dict
+    :param team: String
+    :return: Tuple
+    """
+    return len(gpl.generate_legal_moves(chessboard, team)), gpl.is_king_under_check(chessboard, team)
+
+
+def analyse_bitboard(position):
+    """
+    Counts the legal moves of the side to move on a bitboard position and tests its king for check.
+    :param position: bitboard.Position
+    :return: Tuple
+    """
+    return len(position.generate_legal_moves()), position.is_in_check()
+
+
+def measure(function, arguments, repeats):
+    """
+    Repeats an analysis over all positions and returns the analysed positions per second.
+    :param function: Function
+    :param arguments: List
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for argument in arguments:
+            function(*argument)
+    return repeats * len(arguments) / (time.perf_counter() - start)
+
+
+def chessboard_summary(chessboard, team):
+    """
+    Describes a position by its pieces for diagnostics.
+    :param chessboard: Dict
+    :param team: String
+    :return: String
+    """
+    pieces = [
+        piece_.team + "_" + piece_.type_ + str(square)
+        for square, piece_ in ((square, chessboard[square].piece) for square in chessboard)
+        if piece_ is not None
+    ]
+    return team + " to move: " + " ".join(pieces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    positions = [play_line(line) for line in OPENING_LINES]
+    bitboards = [(bitboard.from_chessboard(chessboard, team),) for chessboard, team in positions]
+
+    for (chessboard, team), (position,) in zip(positions, bitboards):
+        if analyse_chessboard(chessboard, team) != analyse_bitboard(position):
+            print("backends disagree on", chessboard_summary(chessboard, team))
+
+    # The backends take turns and the fastest round of each counts, so a busy machine slows both alike.
+    dictionary_rate = bitboard_rate = 0.0
+    for _ in range(args.rounds):
+        dictionary_rate = max(dictionary_rate, measure(analyse_chessboard, positions, 20))
+        bitboard_rate = max(bitboard_rate, measure(analyse_bitboard, bitboards, 200))
+    print("chessboard dictionary {:10.1f} positions/s".format(dictionary_rate))
+    print("bitboard              {:10.1f} positions/s".format(bitboard_rate))
+    print("speedup               {:10.1f}x, the target is 10x".format(bitboard_rate / dictionary_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures the memory held by live chessboards and the cost of clearing the move highlights after a click.
+"""
+
+
+import argparse
+import time
+import tracemalloc
+import board as brd
+import gameplay as gpl
+
+
+def measure_memory(count):
+    """
+    Builds chessboards in the starting position and returns the traced memory per board in bytes.
+    :param count: Integer
+    :return: Float
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    chessboards = []
+    for _ in range(count):
+        chessboard = brd.Chessboard()
+        gpl.populate_chessboard(chessboard)
+        chessboards.append(chessboard)
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return used / count
+
+
+def measure_clear(repeats):
+    """
+    Returns the average time of highlighting the moves of a knight and clearing them again in microseconds.
+    :param repeats: Integer
+    :return: Float
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    gpl.highlight_potential_moves(chessboard, (6, 7), "w")
+    start = time.perf_counter()
+    for _ in range(repeats):
+        gpl.highlight_move(chessboard, gpl.mv.Move((6, 7), (5, 5), "regular_move"))
+        gpl.clear_selection_highlight(chessboard)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boards", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("memory per board   {:10.0f} bytes over {} boards".format(measure_memory(args.boards), args.boards))
+    print("highlight + clear  {:10.2f} us".format(measure_clear(args.repeats)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of drawing the board at different window sizes under the SDL dummy video driver.
+At every window size a piece is selected and deselected repeatedly, the frames are measured with the scaled sprite
+cache and with every sprite scaled again for each frame.
+"""
+
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import board as brd
+import gameplay as gpl
+import graphics as gui
+
+
+SIZES = [489, 400, 640, 800, 321, 1000]
+
+
+def draw_frames(chessboard, size, frames, cached):
+    """
+    Resizes the window, then selects and deselects a knight, drawing a frame after every change.
+    Returns the frame times in milliseconds.
+    :param chessboard: Dict
+    :param size: Integer
+    :param frames: Integer
+    :param cached: Bool, keep the scaled sprites between frames
+    :return: List
+    """
+    win = pygame.display.set_mode((size, size), pygame.RESIZABLE)
+    gui.draw_chessboard(win, chessboard)
+    timings = []
+    for frame in range(frames):
+        if frame % 2 == 0:
+            gpl.highlight_potential_moves(chessboard, (6, 7), "w")
+        else:
+            gpl.clear_selection_highlight(chessboard)
+        start = time.perf_counter()
+        if not cached:
+            gui.scaled_sprites.clear()
+        gui.draw_chessboard(win, chessboard)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=40)
+    args = parser.parse_args()
+
+    pygame.display.set_mode((SIZES[0], SIZES[0]), pygame.RESIZABLE)
+    gui.load_sprites()
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+
+    print("{:>6s} {:>10s} {:>14s} {:>14s}".format("window", "square", "cached", "scaled again"))
+    for size in SIZES:
+        cached = draw_frames(chessboard, size, args.frames, True)
+        uncached = draw_frames(chessboard, size, args.frames, False)
+        print("{:6d} {:7d} px {:11.3f} ms {:11.3f} ms".format(
+            size, gui.get_square_width(pygame.display.get_surface()),
+            statistics.median(cached), statistics.median(uncached)
+        ))
+    print("scaled sprites cached: {} (limit {})".format(len(gui.scaled_sprites), gui.SCALED_SPRITE_LIMIT))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark of the draw tests after every move over long games.
+Random games are played on past any draw, and is_draw, which scans back to the last capture or pawn move, is timed
+against counting the current hash in the whole history of the game. is_insufficient_material, which reads the
+material counts, is timed against counting the pieces on every square of the chessboard.
+"""
+
+
+import argparse
+import random
+import time
+import fen
+import gameplay as gpl
+
+
+def play_random_game(plies, seed):
+    """
+    Plays random legal moves from the starting position until the game has the given number of plies.
+    A move after which the other team has no legal move left is taken back, so the game never ends.
+    :param plies: Integer
+    :param seed: Integer
+    :return: board.Chessboard
+    """
+    generator = random.Random(seed)
+    chessboard, team = fen.load_fen(fen.STARTING_FEN)
+    while len(chessboard.history) < plies:
+        moves = gpl.generate_legal_moves(chessboard, team)
+        if not moves:
+            gpl.unmake_move(chessboard)
+            team = gpl.switch_active_team(team)
+            continue
+        gpl.make_move(chessboard, generator.choice(moves))
+        team = gpl.switch_active_team(team)
+    return chessboard
+
+
+def count_repetitions(chessboard):
+    """
+    Tests for threefold repetition by counting the current hash in the whole history of the game.
+    :param chessboard: Dict
+    :return: Bool
+    """
+    return chessboard.position_hashes.count(chessboard.hash) >= 3
+
+
+def scan_material(chessboard):
+    """
+    Tests for insufficient material by visiting every square of the chessboard.
+    :param chessboard: Dict
+    :return: Bool
+    """
+    knights = 0
+    bishop_colors = set()
+    for position, square in chessboard.items():
+        if square.piece is None or square.piece.type_ == "king":
+            continue
+        if square.piece.type_ == "knight":
+            knights += 1
+        elif square.piece.type_ == "bishop":
+            bishop_colors.add((position[0] + position[1]) % 2)
+        else:
+            return False
+    return knights == 0 and len(bishop_colors) < 2 or knights == 1 and not bishop_colors
+
+
+def measure(function, chessboard, repeats):
+    """
+    Returns the mean time of a draw test in microseconds.
+    :param function: Function
+    :param chessboard: Dict
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(chessboard)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plies", type=int, nargs="*", default=[100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("{:>8s} {:>10s} {:>14s} {:>14s} {:>14s} {:>14s}".format(
+        "plies", "clock", "is_draw", "full count", "material", "board scan"
+    ))
+    for plies in args.plies:
+        chessboard = play_random_game(plies, args.seed)
+        # Below the fifty-move limit is_draw scans the longest stretch it ever has to.
+        chessboard.halfmove_clock = min(chessboard.halfmove_clock, 99)
+        print("{:8d} {:10d} {:11.2f} us {:11.2f} us {:11.2f} us {:11.2f} us".format(
+            len(chessboard.history), chessboard.halfmove_clock,
+            measure(gpl.is_draw, chessboard, args.repeats), measure(count_repetitions, chessboard, args.repeats),
+            measure(gpl.is_insufficient_material, chessboard, args.repeats),
+            measure(scan_material, chessboard, args.repeats)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark of the end of turn test over checkmate, stalemate and middle game positions.
+Compares is_checkmate_stalemate, which stops at the first legal move, with generating the full list of legal moves.
+"""
+
+
+import argparse
+import time
+import gameplay as gpl
+import perft
+
+
+POSITIONS = {
+    "fools mate": {"fen": "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 0 1", "result": "w"},
+    "back rank mate": {"fen": "3R2k1/5ppp/8/8/8/8/5PPP/6K1 b - - 0 1", "result": "b"},
+    "queen stalemate": {"fen": "7k/8/6Q1/8/8/8/8/K7 b - - 0 1", "result": "stalemate"},
+    "pawn stalemate": {"fen": "k7/P7/1K6/8/8/8/8/8 b - - 0 1", "result": "stalemate"},
+    "opening": dict(perft.POSITIONS["start"], result=False),
+    "middle game": dict(perft.POSITIONS["kiwipete"], result=False),
+    "endgame": dict(perft.POSITIONS["endgame"], result=False)
+}
+
+
+def full_list_end(chessboard, team):
+    """
+    End of turn test that generates every legal move before deciding.
+    :param chessboard: Dict
+    :param team: String
+    :return: String or False
+    """
+    if not gpl.generate_legal_moves(chessboard, team):
+        return team if gpl.is_king_under_check(chessboard, team) else "stalemate"
+    return False
+
+
+def measure(function, chessboard, team, repeats):
+    """
+    Returns the average time of an end of turn test in microseconds.
+    :param function: Function
+    :param chessboard: Dict
+    :param team: String
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(chessboard, team)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print("{:16s} {:>10s} {:>14s} {:>14s}".format("position", "result", "early exit", "full list"))
+    for name, position in POSITIONS.items():
+        chessboard, team = perft.setup_chessboard(position)
+        result = gpl.is_checkmate_stalemate(chessboard, team)
+        assert result == position["result"] == full_list_end(chessboard, team), name
+        early = measure(gpl.is_checkmate_stalemate, chessboard, team, args.repeats)
+        full = measure(full_list_end, chessboard, team, args.repeats)
+        print("{:16s} {:>10s} {:11.1f} us {:11.1f} us".format(name, str(result), early, full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of FEN parsing, loading and writing over a file of FEN records, one per line.
+Without a file, positions are collected from random games started from the perft test positions.
+Loading is timed into a new chessboard and into one reused chessboard, as bulk loading does.
+"""
+
+
+import argparse
+import random
+import time
+import fen
+import gameplay as gpl
+import perft
+
+
+def generate_records(count, seed):
+    """
+    Plays random games from the perft test positions and returns the FEN records of the positions reached.
+    :param count: Integer
+    :param seed: Integer
+    :return: List
+    """
+    generator = random.Random(seed)
+    records = []
+    while len(records) < count:
+        for position in perft.POSITIONS.values():
+            chessboard, team = perft.setup_chessboard(position)
+            for _ in range(60):
+                moves = gpl.generate_legal_moves(chessboard, team)
+                if not moves or len(records) >= count:
+                    break
+                gpl.make_move(chessboard, generator.choice(moves))
+                team = gpl.switch_active_team(team)
+                records.append(fen.to_fen(chessboard, team))
+    return records
+
+
+def read_records(path):
+    """
+    Reads the FEN records of a file, skipping empty lines.
+    :param path: String
+    :return: List
+    """
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def measure(function, records):
+    """
+    Returns the number of records per second a function handles.
+    :param function: Function called with every record
+    :param records: List
+    :return: Float
+    """
+    start = time.perf_counter()
+    for record in records:
+        function(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--file", help="FEN records, one per line")
+    parser.add_argument("--positions", type=int, default=5000, help="number of generated records without a file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    records = read_records(args.file) if args.file else generate_records(args.positions, args.seed)
+    chessboard = fen.load_fen(fen.STARTING_FEN)[0]
+    loaded = [fen.load_fen(record) for record in records]
+
+    print("{} records".format(len(records)))
+    for name, function in [
+        ("parse", fen.parse_fen),
+        ("load new board", fen.load_fen),
+        ("load reused board", lambda record: fen.load_fen(record, chessboard)),
+    ]:
+        rate = measure(function, records)
+        print("{:18s} {:10.0f} records/s {:8.1f} us".format(name, rate, 1e6 / rate))
+    rate = measure(lambda position: fen.to_fen(*position), loaded)
+    print("{:18s} {:10.0f} records/s {:8.1f} us".format("write", rate, 1e6 / rate))
+
+
+if __name__ == '__main__':
+    main()
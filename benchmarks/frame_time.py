@@ -0,0 +1,125 @@
+"""
+Frame time benchmark of graphics.draw_chessboard under the SDL dummy video driver.
+Replays a game of selections and moves, drawing every frame once from scratch and once with dirty rectangles only,
+and measures idle frames in which nothing changed.
+"""
+
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import board as brd
+import gameplay as gpl
+import globals as glb
+import graphics as gui
+
+
+def record_game(plies, seed):
+    """
+    Picks random legal moves for a game.
+    :param plies: Integer
+    :param seed: Integer
+    :return: List
+    """
+    generator = random.Random(seed)
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    team = "w"
+    game = []
+    for _ in range(plies):
+        moves = gpl.generate_legal_moves(chessboard, team)
+        if not moves:
+            break
+        game.append(generator.choice(moves))
+        gpl.make_move(chessboard, game[-1])
+        team = gpl.switch_active_team(team)
+    return game
+
+
+def draw_game(win, game, full):
+    """
+    Replays a game, drawing a frame after every selection and every move, and returns the frame times in
+    milliseconds.
+    :param win: pygame.Surface
+    :param game: List
+    :param full: Bool, redraw the whole window every frame
+    :return: List
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    gui.invalidate_chessboard()
+    team = "w"
+    timings = []
+
+    def draw():
+        start = time.perf_counter()
+        if full:
+            gui.invalidate_chessboard()
+        gui.draw_chessboard(win, chessboard)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    for move in game:
+        gpl.highlight_potential_moves(chessboard, move.source, team)
+        draw()
+        gpl.clear_selection_highlight(chessboard)
+        gpl.make_move(chessboard, move)
+        draw()
+        team = gpl.switch_active_team(team)
+    return timings
+
+
+def draw_idle(win, frames):
+    """
+    Draws frames in which nothing changed and returns their times in milliseconds.
+    :param win: pygame.Surface
+    :param frames: Integer
+    :return: List
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    gui.invalidate_chessboard()
+    gui.draw_chessboard(win, chessboard)
+    timings = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        gui.draw_chessboard(win, chessboard)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    """
+    Prints the median and the slowest frame time.
+    :param name: String
+    :param timings: List
+    :return: None
+    """
+    print("  {:18s} median {:7.3f} ms  max {:7.3f} ms  {:8.0f} frames/s".format(
+        name, statistics.median(timings), max(timings), 1000 / statistics.mean(timings)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plies", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    win = pygame.display.set_mode((glb.BOARDWIDTH, glb.BOARDWIDTH))
+    game = record_game(args.plies, args.seed)
+
+    print("{} plies, {} frames".format(len(game), 2 * len(game)))
+    report("full redraw", draw_game(win, game, True))
+    report("dirty rectangles", draw_game(win, game, False))
+    report("idle", draw_idle(win, 2 * len(game)))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures the cold start of the headless rules core in fresh interpreters.
+"""
+
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+IMPORT_PROBE = """
+import sys
+import time
+start = time.perf_counter()
+import gameplay
+chessboard = gameplay.brd.Chessboard()
+gameplay.populate_chessboard(chessboard)
+end = gameplay.is_checkmate_stalemate(chessboard, "w")
+elapsed = time.perf_counter() - start
+assert "pygame" not in sys.modules, "rules core imported pygame"
+assert "graphics" not in sys.modules, "rules core imported the gui"
+print(elapsed)
+"""
+
+
+def measure(runs):
+    """
+    Imports the rules core, sets up a board and runs the end of game test in separate interpreters.
+    :param runs: Integer
+    :return: List
+    """
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip()))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = measure(args.runs)
+    print("cold start over {} runs".format(args.runs))
+    print("  min    {:8.2f} ms".format(min(timings) * 1000))
+    print("  median {:8.2f} ms".format(statistics.median(timings) * 1000))
+    print("  max    {:8.2f} ms".format(max(timings) * 1000))
+
+
+if __name__ == '__main__':
+    main()
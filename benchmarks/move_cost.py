@@ -0,0 +1,54 @@
+"""
+Microbenchmark of the per-move cost of the gameplay rules on the perft test positions.
+Measures executing and taking back every legal move, finding the king for the check test and the end of game test.
+"""
+
+
+import argparse
+import time
+import gameplay as gpl
+import perft
+
+
+def measure(function, repeats):
+    """
+    Returns the average time of a function call in microseconds.
+    :param function: Function
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def make_unmake_all(chessboard, moves):
+    """
+    Executes and takes back every move of a list.
+    :param chessboard: Dict
+    :param moves: List
+    :return: None
+    """
+    for move in moves:
+        gpl.make_move(chessboard, move)
+        gpl.unmake_move(chessboard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print("{:12s} {:>14s} {:>16s} {:>16s}".format("position", "make+unmake", "king check", "valid move left"))
+    for name, position in perft.POSITIONS.items():
+        chessboard, team = perft.setup_chessboard(position)
+        moves = gpl.generate_legal_moves(chessboard, team)
+        per_move = measure(lambda: make_unmake_all(chessboard, moves), args.repeats) / len(moves)
+        check = measure(lambda: gpl.is_king_under_check(chessboard, team), args.repeats)
+        valid = measure(lambda: gpl.is_valid_move_left(chessboard, team), args.repeats // 10 or 1)
+        print("{:12s} {:11.1f} us {:13.1f} us {:13.1f} us".format(name, per_move, check, valid))
+
+
+if __name__ == '__main__':
+    main()
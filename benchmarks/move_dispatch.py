@@ -0,0 +1,152 @@
+"""
+Microbenchmark of do_move and is_check_caused on the perft test positions, with the function tables and with the
+string dispatch they replaced.
+do_move reads the kind of every legal move from the highlighted destination square and executes it, the board is
+restored with unmake_move outside of the timing. is_check_caused makes the move, tests the king and takes it back.
+The string dispatch is a shim swapped into gameplay for the "exec" columns: the move kind is found by evaluating the
+flag name of every kind, the move function is called from a generated "do_" + kind call string and the squares of
+every threat to the king are found by evaluating a generated table expression, each compiled on every call like
+the exec and eval calls of the old code.
+"""
+
+
+import argparse
+import contextlib
+import time
+import gameplay as gpl
+import perft
+
+
+# Threat: source of the expression that looks up the squares it attacks the king from.
+THREAT_SOURCES = {
+    "king": "KING_TARGETS[king]", "knight": "KNIGHT_TARGETS[king]", "pawn": "PAWN_CAPTURES[team][king]",
+    "rook": "ROOK_RAYS[king]", "bishop": "BISHOP_RAYS[king]"
+}
+
+
+def exec_move_function(kind):
+    """
+    Returns a move function that calls do_<kind> from a call string with exec.
+    :param kind: String
+    :return: Function
+    """
+    def run(chessboard, source, destination):
+        local = {"chessboard": chessboard, "source": source, "destination": destination}
+        exec("do_" + kind + "(chessboard, source, destination)", vars(gpl), local)
+    return run
+
+
+def eval_move_kind(chessboard, destination):
+    """
+    Reads the move kind of a highlighted square by evaluating the flag name of every kind.
+    :param chessboard: Dict
+    :param destination: Tuple
+    :return: String or None
+    """
+    for kind in gpl.MOVE_KINDS:
+        if eval("chessboard[destination]." + kind, {"chessboard": chessboard, "destination": destination}):
+            return kind
+    return None
+
+
+def eval_is_king_under_check(chessboard, team):
+    """
+    Tests the king of a team for check with the squares of every threat found by evaluating THREAT_SOURCES.
+    :param chessboard: Dict
+    :param team: String
+    :return: Bool
+    """
+    local = {"king": chessboard.kings[team], "team": team}
+    for threat in ["king", "knight", "pawn"]:
+        for square in eval(THREAT_SOURCES[threat], vars(gpl), local):
+            attacker = chessboard[square].piece
+            if attacker is not None and attacker.type_ == threat and attacker.team != team:
+                return True
+    for threat, sliders in [("rook", ["rook", "queen"]), ("bishop", ["bishop", "queen"])]:
+        for ray in eval(THREAT_SOURCES[threat], vars(gpl), local):
+            for square in ray:
+                attacker = chessboard[square].piece
+                if attacker is not None:
+                    if attacker.type_ in sliders and attacker.team != team:
+                        return True
+                    break
+    return False
+
+
+@contextlib.contextmanager
+def string_dispatch():
+    """
+    Swaps the move function table, the move kind reader and the check test of gameplay for the string dispatch shim.
+    :return: None
+    """
+    saved = gpl.MOVE_FUNCTIONS, gpl.get_move_kind, gpl.is_king_under_check
+    gpl.MOVE_FUNCTIONS = {kind: exec_move_function(kind) for kind in saved[0]}
+    gpl.get_move_kind = eval_move_kind
+    gpl.is_king_under_check = eval_is_king_under_check
+    try:
+        yield
+    finally:
+        gpl.MOVE_FUNCTIONS, gpl.get_move_kind, gpl.is_king_under_check = saved
+
+
+def measure_do_move(chessboard, moves, team, repeats):
+    """
+    Returns the number of moves per second do_move executes. Only the do_move call is timed, the highlighting that
+    gives the kind of the move and the unmake_move that restores the board are not.
+    :param chessboard: Dict
+    :param moves: List
+    :param team: String
+    :param repeats: Integer
+    :return: Float
+    """
+    elapsed = 0.0
+    for _ in range(repeats):
+        for move in moves:
+            gpl.highlight_potential_moves(chessboard, move.source, team)
+            gpl.record_move(chessboard, move)
+            start = time.perf_counter()
+            gpl.do_move(chessboard, move.source, move.destination)
+            elapsed += time.perf_counter() - start
+            gpl.unmake_move(chessboard)
+            gpl.clear_selection_highlight(chessboard)
+    return repeats * len(moves) / elapsed
+
+
+def measure_is_check_caused(chessboard, moves, team, repeats):
+    """
+    Returns the number of moves per second is_check_caused tests.
+    :param chessboard: Dict
+    :param moves: List
+    :param team: String
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for move in moves:
+            gpl.is_check_caused(chessboard, move, team)
+    return repeats * len(moves) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    print("{:12s} {:>28s} {:>28s}".format("", "do_move moves/s", "is_check_caused moves/s"))
+    print("{:12s} {:>13s} {:>14s} {:>13s} {:>14s}".format("position", "exec", "tables", "exec", "tables"))
+    for name, position in perft.POSITIONS.items():
+        chessboard, team = perft.setup_chessboard(position)
+        moves = gpl.generate_legal_moves(chessboard, team)
+        with string_dispatch():
+            exec_applied = measure_do_move(chessboard, moves, team, args.repeats)
+            exec_checked = measure_is_check_caused(chessboard, moves, team, args.repeats)
+        applied = measure_do_move(chessboard, moves, team, args.repeats)
+        checked = measure_is_check_caused(chessboard, moves, team, args.repeats)
+        print("{:12s} {:13.0f} {:14.0f} {:13.0f} {:14.0f}".format(
+            name, exec_applied, applied, exec_checked, checked
+        ))
+
+
+if __name__ == '__main__':
+    main()
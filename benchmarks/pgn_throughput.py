@@ -0,0 +1,99 @@
+"""
+Throughput and memory use of the streaming PGN reader.
+A PGN file of random games is written, read back in full, and the peak of the traced memory is compared with reading
+a file with four times the games, which should stay flat.
+"""
+
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import fen
+import gameplay as gpl
+import pgn
+
+
+def write_games(path, count, seed):
+    """
+    Writes a PGN file of random games from the starting position, each up to 120 plies long.
+    :param path: String
+    :param count: Integer
+    :param seed: Integer
+    :return: None
+    """
+    generator = random.Random(seed)
+    with open(path, "w") as file:
+        for number in range(count):
+            chessboard, team = fen.load_fen(fen.STARTING_FEN)
+            movetext = []
+            for _ in range(120):
+                moves = gpl.get_legal_moves(chessboard, team)[0]
+                if not moves:
+                    break
+                move = generator.choice(moves)
+                if team == "w":
+                    movetext.append("{}.".format(chessboard.fullmove_number))
+                movetext.append(pgn.move_to_san(chessboard, team, move, moves))
+                gpl.make_move(chessboard, move)
+                team = gpl.switch_active_team(team)
+            file.write('[Event "random {}"]\n[Result "*"]\n\n{} *\n\n'.format(number, " ".join(movetext)))
+
+
+def read_all(path):
+    """
+    Reads every game of a PGN file and returns the number of games and moves.
+    :param path: String
+    :return: Tuple
+    """
+    games = moves = 0
+    for game in pgn.read_pgn(path):
+        games += 1
+        moves += len(game["moves"])
+    return games, moves
+
+
+def peak_memory(path):
+    """
+    Returns the peak of the memory traced while reading a PGN file in bytes.
+    :param path: String
+    :return: Integer
+    """
+    gpl.position_cache.clear()
+    tracemalloc.start()
+    read_all(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    small = os.path.join(directory, "small.pgn")
+    large = os.path.join(directory, "large.pgn")
+    write_games(small, args.games, args.seed)
+    write_games(large, 4 * args.games, args.seed)
+
+    start = time.perf_counter()
+    games, moves = read_all(large)
+    elapsed = time.perf_counter() - start
+    print("{} games, {} moves in {:.2f} s: {:.0f} games/s, {:.0f} moves/s".format(
+        games, moves, elapsed, games / elapsed, moves / elapsed
+    ))
+    print("peak memory {:8.0f} kB for {:5d} games, {:8.0f} kB for {:5d} games".format(
+        peak_memory(small) / 1024, args.games, peak_memory(large) / 1024, 4 * args.games
+    ))
+    for path in [small, large]:
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
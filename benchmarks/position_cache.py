@@ -0,0 +1,79 @@
+"""
+Benchmark of the position cache of legal moves and check status.
+Replays an opening several times and compares generating the legal moves of every position with answering them from
+the cache, then prints the hit, miss and eviction counters.
+"""
+
+
+import argparse
+import time
+import board as brd
+import cache
+import gameplay as gpl
+import perft
+
+
+OPENING = [
+    "e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6", "e1g1", "f8e7",
+    "f1e1", "b7b5", "a4b3", "d7d6", "c2c3", "e8g8", "h2h3", "c6b8", "d2d4", "b8d7"
+]
+
+
+def replay(lookup):
+    """
+    Plays the opening from the starting position, looking up the legal moves of every position on the way.
+    :param lookup: Function returning the legal moves and check status of a position
+    :return: Integer, number of legal moves seen
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    team = "w"
+    seen = 0
+    for name in OPENING:
+        moves, _ = lookup(chessboard, team)
+        seen += len(moves)
+        move = next(move for move in moves if perft.move_name(*move) == name)
+        gpl.make_move(chessboard, move)
+        team = gpl.switch_active_team(team)
+    return seen
+
+
+def generate(chessboard, team):
+    """
+    Generates the legal moves and check status without the cache.
+    :param chessboard: Dict
+    :param team: String
+    :return: Tuple
+    """
+    legality = gpl.get_legality(chessboard, team)
+    return gpl.generate_legal_moves(chessboard, team, legality), bool(legality["checkers"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replays", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=4096)
+    args = parser.parse_args()
+
+    gpl.position_cache = cache.PositionCache(args.capacity)
+
+    start = time.perf_counter()
+    for _ in range(args.replays):
+        expected = replay(generate)
+    generated = (time.perf_counter() - start) / args.replays
+
+    start = time.perf_counter()
+    for _ in range(args.replays):
+        assert replay(gpl.get_legal_moves) == expected
+    cached = (time.perf_counter() - start) / args.replays
+
+    statistics = gpl.position_cache.statistics()
+    print("opening of {} plies, {} replays".format(len(OPENING), args.replays))
+    print("  generated {:9.2f} ms per replay".format(generated * 1e3))
+    print("  cached    {:9.2f} ms per replay ({:.1f}x)".format(cached * 1e3, generated / cached))
+    print("  hits {hits}, misses {misses}, evictions {evictions}, entries {entries}/{capacity}".format(**statistics))
+    print("  packed arrays {:.1f} MB".format(statistics["bytes"] / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Measures the cost of profiling the hot gameplay functions on perft of the test positions.
+The same perft runs with the original functions and instrumented, then the statistics gathered are printed.
+"""
+
+
+import argparse
+import time
+import gameplay as gpl
+import perft
+import profiling
+
+
+def measure(depth):
+    """
+    Returns the seconds perft of all test positions takes at the given depth.
+    :param depth: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for position in perft.POSITIONS.values():
+        chessboard, team = perft.setup_chessboard(position)
+        perft.perft_chessboard(chessboard, team, depth)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+
+    disabled = measure(args.depth)
+    profiling.instrument(gpl)
+    enabled = measure(args.depth)
+    profiling.uninstrument(gpl)
+
+    print("disabled {:8.3f} s".format(disabled))
+    print("enabled  {:8.3f} s, {:+.1f} %".format(enabled, 100 * (enabled - disabled) / disabled))
+    for line in profiling.report_lines():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark of the sprite atlas of the gui under the SDL dummy video driver.
+Counts the image files decoded while setting up and drawing boards and showing the promotion choice, and compares
+blitting the converted atlas sprites with blitting images straight from the files.
+"""
+
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import board as brd
+import gameplay as gpl
+import globals as glb
+import graphics as gui
+
+
+def count_loads(function):
+    """
+    Calls a function and returns the number of images it decoded and its time in milliseconds.
+    :param function: Function
+    :return: Tuple
+    """
+    load = pygame.image.load
+    loads = []
+
+    def counting_load(*args, **kwargs):
+        loads.append(args[0])
+        return load(*args, **kwargs)
+
+    pygame.image.load = counting_load
+    try:
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        pygame.image.load = load
+    return len(loads), elapsed
+
+
+def set_up_and_draw(win):
+    """
+    Sets up a board, draws it from scratch and shows and draws the promotion choice.
+    :param win: pygame.Surface
+    :return: None
+    """
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    gui.invalidate_chessboard()
+    gui.draw_chessboard(win, chessboard)
+    gui.set_promotion_display(chessboard, (0, 0))
+    gui.draw_chessboard(win, chessboard)
+
+
+def measure_blits(win, images, repeats):
+    """
+    Returns the average time of blitting every image once in microseconds.
+    :param win: pygame.Surface
+    :param images: List
+    :param repeats: Integer
+    :return: Float
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image in images:
+            win.blit(image, (0, 0))
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    win = pygame.display.set_mode((glb.BOARDWIDTH, glb.BOARDWIDTH))
+    print("board setup, full frame and promotion choice")
+    for name in ["cold", "warm"]:
+        loads, elapsed = count_loads(lambda: set_up_and_draw(win))
+        print("  {:5s} {:3d} image files decoded {:8.2f} ms".format(name, loads, elapsed))
+
+    raw = [pygame.image.load("images/" + key + ".png") for key in brd.basic_pieces]
+    converted = [gui.get_sprite(key) for key in brd.basic_pieces]
+    print("blitting the {} piece images".format(len(raw)))
+    print("  from files      {:8.1f} us".format(measure_blits(win, raw, args.repeats)))
+    print("  atlas sprites   {:8.1f} us".format(measure_blits(win, converted, args.repeats)))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
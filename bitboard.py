@@ -0,0 +1,767 @@
+"""
+Bitboard position backend used for analysis workloads.
+Every team and piece type combination is stored as a 64-bit occupancy integer. Bit 0 is the bottom left square
+(0, 7) of the chessboard dictionary and bit 63 is the top right square (7, 0).
+Sliding attacks are looked up in tables keyed by the squares that can block them, filled from the rays on first use.
+Legal moves are generated directly from the checking pieces and pin rays of the king, moves are packed integers.
+"""
+
+
+TEAMS = ("w", "b")
+TYPES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PROMOTION_TYPES = ("queen", "rook", "bishop", "knight")
+
+NORTH, EAST, NORTH_EAST, NORTH_WEST, SOUTH, WEST, SOUTH_EAST, SOUTH_WEST = range(8)
+DIRECTION_STEPS = {
+    NORTH: (0, 1), EAST: (1, 0), NORTH_EAST: (1, 1), NORTH_WEST: (-1, 1),
+    SOUTH: (0, -1), WEST: (-1, 0), SOUTH_EAST: (1, -1), SOUTH_WEST: (-1, -1)
+}
+POSITIVE_DIRECTIONS = (NORTH, EAST, NORTH_EAST, NORTH_WEST)
+ROOK_DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+W_KINGSIDE, W_QUEENSIDE, B_KINGSIDE, B_QUEENSIDE = 1, 2, 4, 8
+ALL_SQUARES = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = ALL_SQUARES ^ FILE_A
+NOT_FILE_H = ALL_SQUARES ^ FILE_H
+LAST_RANKS = 0xFF | 0xFF << 56
+# Ranks of the squares pawns pass on a double move.
+WHITE_DOUBLE_RANK = 0xFF << 16
+BLACK_DOUBLE_RANK = 0xFF << 40
+
+# Move kinds in the order of cache.KINDS and promotions in the order of cache.PROMOTIONS, so both pack moves alike.
+MOVE_KINDS = ("regular_move", "eat_move", "double_move", "castle_move", "enpassant_move", "promotion_move")
+REGULAR, EAT, DOUBLE, CASTLE, ENPASSANT, PROMOTION = range(6)
+MOVE_PROMOTIONS = (None,) + PROMOTION_TYPES
+PROMOTION_CODES = (1, 2, 3, 4)
+# Promotion code: piece type index.
+PROMOTION_PIECES = (None, QUEEN, ROOK, BISHOP, KNIGHT)
+
+
+def square_index(square):
+    """
+    Converts a chessboard dictionary key to a bit index.
+    :param square: Tuple
+    :return: Integer
+    """
+    return (7 - square[1]) * 8 + square[0]
+
+
+def index_square(index):
+    """
+    Converts a bit index to a chessboard dictionary key.
+    :param index: Integer
+    :return: Tuple
+    """
+    return index % 8, 7 - index // 8
+
+
+def _offset_targets(index, offsets):
+    """
+    Builds the bitboard of squares reachable from a square with single step offsets.
+    :param index: Integer
+    :param offsets: List
+    :return: Integer
+    """
+    file, rank = index % 8, index // 8
+    targets = 0
+    for offset_file, offset_rank in offsets:
+        if 0 <= file + offset_file < 8 and 0 <= rank + offset_rank < 8:
+            targets |= 1 << ((rank + offset_rank) * 8 + file + offset_file)
+    return targets
+
+
+def _ray(index, direction):
+    """
+    Builds the bitboard of all squares in a direction from a square, not including the square itself.
+    :param index: Integer
+    :param direction: Integer
+    :return: Integer
+    """
+    step_file, step_rank = DIRECTION_STEPS[direction]
+    file, rank = index % 8 + step_file, index // 8 + step_rank
+    ray = 0
+    while 0 <= file < 8 and 0 <= rank < 8:
+        ray |= 1 << (rank * 8 + file)
+        file, rank = file + step_file, rank + step_rank
+    return ray
+
+
+def _between(index, target):
+    """
+    Builds the bitboard of the squares between two squares on a common ray, empty if they share no ray.
+    :param index: Integer
+    :param target: Integer
+    :return: Integer
+    """
+    for direction in range(8):
+        if RAYS[direction][index] >> target & 1:
+            return RAYS[direction][index] ^ RAYS[direction][target] ^ (1 << target)
+    return 0
+
+
+KNIGHT_ATTACKS = [
+    _offset_targets(index, [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+    for index in range(64)
+]
+KING_ATTACKS = [
+    _offset_targets(index, [(1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1)])
+    for index in range(64)
+]
+PAWN_ATTACKS = [
+    [_offset_targets(index, [(-1, 1), (1, 1)]) for index in range(64)],
+    [_offset_targets(index, [(-1, -1), (1, -1)]) for index in range(64)]
+]
+RAYS = [[_ray(index, direction) for index in range(64)] for direction in range(8)]
+# Square: the non-empty rays of a slider with the ray table and the order of their direction, so the attacks of a
+# slider are found in one loop.
+ROOK_LINES, BISHOP_LINES, QUEEN_LINES = [
+    [
+        tuple(
+            (RAYS[direction][index], RAYS[direction], direction in POSITIVE_DIRECTIONS)
+            for direction in directions if RAYS[direction][index]
+        )
+        for index in range(64)
+    ]
+    for directions in [ROOK_DIRECTIONS, BISHOP_DIRECTIONS, ROOK_DIRECTIONS + BISHOP_DIRECTIONS]
+]
+
+# Square, square on one of its rays: the squares between the two.
+BETWEEN = [[_between(index, target) for target in range(64)] for index in range(64)]
+
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[4] = 15 ^ (W_KINGSIDE | W_QUEENSIDE)
+CASTLING_MASK[7] = 15 ^ W_KINGSIDE
+CASTLING_MASK[0] = 15 ^ W_QUEENSIDE
+CASTLING_MASK[60] = 15 ^ (B_KINGSIDE | B_QUEENSIDE)
+CASTLING_MASK[63] = 15 ^ B_KINGSIDE
+CASTLING_MASK[56] = 15 ^ B_QUEENSIDE
+
+# Castling right: (king square, rook square, king destination, rook destination, empty squares, safe squares)
+CASTLING = {
+    W_KINGSIDE: (4, 7, 6, 5, (1 << 5) | (1 << 6), (4, 5, 6)),
+    W_QUEENSIDE: (4, 0, 2, 3, (1 << 1) | (1 << 2) | (1 << 3), (4, 3, 2)),
+    B_KINGSIDE: (60, 63, 62, 61, (1 << 61) | (1 << 62), (60, 61, 62)),
+    B_QUEENSIDE: (60, 56, 58, 59, (1 << 57) | (1 << 58) | (1 << 59), (60, 59, 58))
+}
+TEAM_CASTLING = ((W_KINGSIDE, W_QUEENSIDE), (B_KINGSIDE, B_QUEENSIDE))
+# Castling right: squares the king passes and lands on, which must not be attacked.
+CASTLING_PATH = {
+    right: sum(1 << index for index in safe[1:]) for right, (_, _, _, _, _, safe) in CASTLING.items()
+}
+# Square: the rays along its rank, for the rook or queen an en passant capture can uncover.
+RANK_LINES = [
+    tuple(
+        (RAYS[direction][index], RAYS[direction], direction in POSITIVE_DIRECTIONS)
+        for direction in (EAST, WEST) if RAYS[direction][index]
+    )
+    for index in range(64)
+]
+# Largest number of entries an attack or move table keeps, see AttackTable and MoveTable.
+MAX_TABLE_ENTRIES = 1024
+# Largest number of piece sets SQUARE_TABLE keeps.
+MAX_SQUARE_SETS = 16384
+
+
+def line_attacks(lines, occupied):
+    """
+    Returns the squares attacked along the rays of a square, each stopping at and including its first blocker.
+    :param lines: Tuple of (ray, rays of the direction, positive direction) entries, see ROOK_LINES
+    :param occupied: Integer
+    :return: Integer
+    """
+    attacks = 0
+    for ray, rays, positive in lines:
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                ray ^= rays[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def _blocker_mask(lines):
+    """
+    Builds the bitboard of the squares that can block the rays of a square, which are all but the last of each ray.
+    :param lines: Tuple of (ray, rays of the direction, positive direction) entries, see ROOK_LINES
+    :return: Integer
+    """
+    mask = 0
+    for ray, _, positive in lines:
+        last = ray.bit_length() - 1 if positive else (ray & -ray).bit_length() - 1
+        mask |= ray ^ (1 << last)
+    return mask
+
+
+class AttackTable(dict):
+    """
+    Attacks of a slider on one square keyed by the occupied squares that can block it, see ROOK_MASKS.
+    A missing occupancy is walked along the rays on first use and kept while the table holds fewer than
+    MAX_TABLE_ENTRIES entries, so a slider costs one lookup once its surroundings have been seen.
+    """
+    def __init__(self, lines):
+        super().__init__()
+        self.lines = lines
+
+    def __missing__(self, blockers):
+        attacks = line_attacks(self.lines, blockers)
+        if len(self) < MAX_TABLE_ENTRIES:
+            self[blockers] = attacks
+        return attacks
+
+
+class SquareTable(dict):
+    """
+    Indexes of the set bits of a bitboard keyed by the bitboard, so the pieces of a type are walked without bit
+    tricks. A missing bitboard is split on first use and kept while the table holds fewer than MAX_SQUARE_SETS
+    entries.
+    """
+    def __missing__(self, bits):
+        indexes = []
+        remaining = bits
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            indexes.append(bit.bit_length() - 1)
+        indexes = tuple(indexes)
+        if len(self) < MAX_SQUARE_SETS:
+            self[bits] = indexes
+        return indexes
+
+
+SQUARE_TABLE = SquareTable()
+ROOK_TABLES = [AttackTable(lines) for lines in ROOK_LINES]
+BISHOP_TABLES = [AttackTable(lines) for lines in BISHOP_LINES]
+# Square: the squares that can block a slider on it, which key its attack table.
+ROOK_MASKS = [_blocker_mask(lines) for lines in ROOK_LINES]
+BISHOP_MASKS = [_blocker_mask(lines) for lines in BISHOP_LINES]
+# Square: all squares a slider on it reaches on an empty board.
+ROOK_REACH = [line_attacks(lines, 0) for lines in ROOK_LINES]
+BISHOP_REACH = [line_attacks(lines, 0) for lines in BISHOP_LINES]
+
+
+def rook_attacks(index, occupied):
+    """
+    Returns the squares attacked by a rook.
+    :param index: Integer
+    :param occupied: Integer
+    :return: Integer
+    """
+    return ROOK_TABLES[index][occupied & ROOK_MASKS[index]]
+
+
+def bishop_attacks(index, occupied):
+    """
+    Returns the squares attacked by a bishop.
+    :param index: Integer
+    :param occupied: Integer
+    :return: Integer
+    """
+    return BISHOP_TABLES[index][occupied & BISHOP_MASKS[index]]
+
+
+def encode_move(source, destination, kind, promotion=None):
+    """
+    Packs a move into an integer: source and destination indexes in 6 bits each, kind and promotion in 3 bits each.
+    :param source: Integer
+    :param destination: Integer
+    :param kind: String
+    :param promotion: String or None
+    :return: Integer
+    """
+    return source | destination << 6 | MOVE_KINDS.index(kind) << 12 | MOVE_PROMOTIONS.index(promotion) << 15
+
+
+def decode_move(move):
+    """
+    Unpacks a move encoded by encode_move.
+    :param move: Integer
+    :return: Tuple of the source and destination indexes, the kind and the promotion type
+    """
+    return move & 63, move >> 6 & 63, MOVE_KINDS[move >> 12 & 7], MOVE_PROMOTIONS[move >> 15]
+
+
+class MoveTable(dict):
+    """
+    Packed moves of one kind keyed by the bitboard of their destinations, so a whole target set becomes a move list
+    in one lookup. The source is either fixed, for the tables of a square, or the destination minus a pawn step, and
+    a pawn step onto the last rank becomes the four promotion moves. The tables of a square take the captures shifted
+    above the quiet targets, destination + 64, so the moves of a piece are one lookup.
+    A missing target set is packed on first use and kept while the table holds fewer than MAX_TABLE_ENTRIES entries.
+    """
+    def __init__(self, kind, source=None, step=0):
+        super().__init__()
+        self.kind = kind
+        self.source = source
+        self.step = step
+
+    def __missing__(self, targets):
+        moves = []
+        remaining = targets
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            destination = bit.bit_length() - 1
+            if destination >= 64:
+                moves.append(self.source | destination - 64 << 6 | EAT << 12)
+            elif self.source is not None:
+                moves.append(self.source | destination << 6 | self.kind << 12)
+            elif bit & LAST_RANKS:
+                for promotion in PROMOTION_CODES:
+                    moves.append(destination - self.step | destination << 6 | PROMOTION << 12 | promotion << 15)
+            else:
+                moves.append(destination - self.step | destination << 6 | self.kind << 12)
+        moves = tuple(moves)
+        if len(self) < MAX_TABLE_ENTRIES:
+            self[targets] = moves
+        return moves
+
+
+# Square: table of its quiet moves and captures.
+MOVE_TABLES = [MoveTable(REGULAR, index) for index in range(64)]
+# Bishop and rook attack tables, blocker masks and reaches, with the piece that moves along their lines besides the
+# queen.
+SLIDER_TABLES = (
+    (BISHOP_TABLES, BISHOP_MASKS, BISHOP_REACH, BISHOP), (ROOK_TABLES, ROOK_MASKS, ROOK_REACH, ROOK)
+)
+# Team: tables of its single pushes, left captures, right captures and double pushes.
+PAWN_TABLES = [
+    (MoveTable(REGULAR, step=8), MoveTable(EAT, step=7), MoveTable(EAT, step=9), MoveTable(DOUBLE, step=16)),
+    (MoveTable(REGULAR, step=-8), MoveTable(EAT, step=-9), MoveTable(EAT, step=-7), MoveTable(DOUBLE, step=-16))
+]
+
+
+class Position:
+    """
+    Position stored as twelve bitboards plus a square to piece lookup for captures.
+    Contains the side to move, castling rights and the en passant target square.
+    Moves are integers packing the source and destination indexes, the kind and the promotion, see encode_move.
+    Castling moves go from the king square to the rook square.
+    """
+    def __init__(self):
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.mailbox = [None] * 64
+        self.team = 0
+        self.castling = 0
+        self.enpassant = None
+        self.history = []
+
+    def put(self, index, code):
+        """
+        Places a piece with the given code (team * 6 + type) on a square.
+        :param index: Integer
+        :param code: Integer
+        :return: None
+        """
+        bit = 1 << index
+        self.mailbox[index] = code
+        self.bitboards[code] |= bit
+        self.occupancy[code // 6] |= bit
+
+    def remove(self, index):
+        """
+        Removes the piece from a square and returns its code.
+        :param index: Integer
+        :return: Integer
+        """
+        code = self.mailbox[index]
+        bit = 1 << index
+        self.mailbox[index] = None
+        self.bitboards[code] ^= bit
+        self.occupancy[code // 6] ^= bit
+        return code
+
+    def is_attacked(self, index, attacker):
+        """
+        Tests if a square is attacked by the given team.
+        :param index: Integer
+        :param attacker: Integer
+        :return: Bool
+        """
+        bitboards = self.bitboards
+        base = attacker * 6
+        if KNIGHT_ATTACKS[index] & bitboards[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[index] & bitboards[base + KING]:
+            return True
+        if PAWN_ATTACKS[1 - attacker][index] & bitboards[base + PAWN]:
+            return True
+        occupied = self.occupancy[0] | self.occupancy[1]
+        diagonal = bitboards[base + BISHOP] | bitboards[base + QUEEN]
+        if diagonal & BISHOP_REACH[index] and BISHOP_TABLES[index][occupied & BISHOP_MASKS[index]] & diagonal:
+            return True
+        straight = bitboards[base + ROOK] | bitboards[base + QUEEN]
+        if straight & ROOK_REACH[index] and ROOK_TABLES[index][occupied & ROOK_MASKS[index]] & straight:
+            return True
+        return False
+
+    def king_index(self, team):
+        """
+        Returns the square of the king of a team.
+        :param team: Integer
+        :return: Integer
+        """
+        return self.bitboards[team * 6 + KING].bit_length() - 1
+
+    def is_in_check(self, team=None):
+        """
+        Tests if the king of a team, by default the side to move, is under check.
+        :param team: Integer
+        :return: Bool
+        """
+        if team is None:
+            team = self.team
+        return self.is_attacked(self.bitboards[team * 6 + KING].bit_length() - 1, 1 - team)
+
+    def get_legality(self):
+        """
+        Finds the pieces checking the king of the side to move and its pinned pieces from the sliding attacks of the
+        king square, like gameplay.get_legality.
+        The check mask holds the checking pieces and the squares between sliding checkers and the king, a pinned piece
+        maps to the squares between the king and the pinning piece, the pinning piece included.
+        :return: Tuple of the checkers bitboard, the check mask and the pins dict
+        """
+        us = self.team
+        bitboards = self.bitboards
+        base = (1 - us) * 6
+        own = self.occupancy[us]
+        occupied = own | self.occupancy[1 - us]
+        king = bitboards[us * 6 + KING].bit_length() - 1
+        queens = bitboards[base + QUEEN]
+
+        checkers = KNIGHT_ATTACKS[king] & bitboards[base + KNIGHT] | PAWN_ATTACKS[us][king] & bitboards[base + PAWN]
+        check_mask = checkers
+        pins = {}
+        between = BETWEEN[king]
+        for tables, masks, reaches, piece in SLIDER_TABLES:
+            sliders = (bitboards[base + piece] | queens) & reaches[king]
+            if not sliders:
+                continue
+            table = tables[king]
+            mask = masks[king]
+            attacks = table[occupied & mask]
+            checking = attacks & sliders
+            while checking:
+                bit = checking & -checking
+                checking ^= bit
+                checkers |= bit
+                check_mask |= between[bit.bit_length() - 1] | bit
+            # Sliders seen through one piece of the side to move pin that piece.
+            blockers = attacks & own
+            if blockers:
+                pinners = table[(occupied ^ blockers) & mask] & sliders & ~attacks
+                while pinners:
+                    bit = pinners & -pinners
+                    pinners ^= bit
+                    ray = between[bit.bit_length() - 1]
+                    pins[(ray & own).bit_length() - 1] = ray | bit
+        return checkers, check_mask, pins
+
+    def attacked_squares(self, team, occupied, zone=ALL_SQUARES):
+        """
+        Returns the bitboard of all squares attacked by a team, with sliding attacks blocked by the given occupancy.
+        Given a zone, the attacks of sliders that can not reach it on an empty board are left out, so only the squares
+        of the zone are certain.
+        :param team: Integer
+        :param occupied: Integer
+        :param zone: Integer
+        :return: Integer
+        """
+        bitboards = self.bitboards
+        base = team * 6
+        pawns = bitboards[base + PAWN]
+        if team == 0:
+            attacked = ((pawns & NOT_FILE_A) << 7 | (pawns & NOT_FILE_H) << 9) & ALL_SQUARES
+        else:
+            attacked = (pawns & NOT_FILE_A) >> 9 | (pawns & NOT_FILE_H) >> 7
+        attacked |= KING_ATTACKS[bitboards[base + KING].bit_length() - 1]
+        for index in SQUARE_TABLE[bitboards[base + KNIGHT]]:
+            attacked |= KNIGHT_ATTACKS[index]
+        queens = bitboards[base + QUEEN]
+        for index in SQUARE_TABLE[bitboards[base + BISHOP] | queens]:
+            if BISHOP_REACH[index] & zone:
+                attacked |= BISHOP_TABLES[index][occupied & BISHOP_MASKS[index]]
+        for index in SQUARE_TABLE[bitboards[base + ROOK] | queens]:
+            if ROOK_REACH[index] & zone:
+                attacked |= ROOK_TABLES[index][occupied & ROOK_MASKS[index]]
+        return attacked
+
+    def generate_legal_moves(self):
+        """
+        Generates all moves of the side to move that do not leave its king under check.
+        Moves of pinned pieces are limited to their pin ray and during a single check to the check mask. King moves
+        are tested against the squares attacked by the other team, found once with the king taken off the board, and
+        en passant captures against a rook or queen on the rank of the king.
+        The target set of every piece and pawn step is turned into moves through the move tables.
+        :return: List of integers
+        """
+        moves = []
+        append = moves.append
+        extend = moves.extend
+        us = self.team
+        them = 1 - us
+        bitboards = self.bitboards
+        base = us * 6
+        own = self.occupancy[us]
+        enemy = self.occupancy[them]
+        occupied = own | enemy
+        empty = ALL_SQUARES ^ occupied
+        king = bitboards[base + KING].bit_length() - 1
+        checkers, check_mask, pins = self.get_legality()
+
+        castles = []
+        if self.castling and not checkers:
+            for right in TEAM_CASTLING[us]:
+                if self.castling & right and not occupied & CASTLING[right][4]:
+                    castles.append(right)
+        targets = KING_ATTACKS[king] & ~own
+        if targets or castles:
+            zone = targets
+            for right in castles:
+                zone |= CASTLING_PATH[right]
+            attacked = self.attacked_squares(them, occupied ^ (1 << king), zone)
+            targets &= ~attacked
+            if targets:
+                extend(MOVE_TABLES[king][targets & empty | (targets & enemy) << 64])
+            for right in castles:
+                if not attacked & CASTLING_PATH[right]:
+                    append(king | CASTLING[right][1] << 6 | CASTLE << 12)
+        if checkers & (checkers - 1):
+            return moves
+
+        allowed = (check_mask if checkers else ALL_SQUARES) & ~own
+        free = ALL_SQUARES
+        for source in pins:
+            free ^= 1 << source
+        quiet_targets = empty & allowed
+        capture_targets = enemy & allowed
+        move_tables = MOVE_TABLES
+        for source in SQUARE_TABLE[bitboards[base + KNIGHT] & free]:
+            attacks = KNIGHT_ATTACKS[source]
+            targets = attacks & quiet_targets | (attacks & capture_targets) << 64
+            if targets:
+                extend(move_tables[source][targets])
+        queens = bitboards[base + QUEEN]
+        # A queen is walked twice, once with the bishop tables and once with the rook tables.
+        for tables, masks, _, piece in SLIDER_TABLES:
+            for source in SQUARE_TABLE[(bitboards[base + piece] | queens) & free]:
+                attacks = tables[source][occupied & masks[source]]
+                targets = attacks & quiet_targets | (attacks & capture_targets) << 64
+                if targets:
+                    extend(move_tables[source][targets])
+
+        pawns = bitboards[base + PAWN]
+        free &= pawns
+        if us == 0:
+            push = 8
+            double_rank = WHITE_DOUBLE_RANK
+            singles = free << 8 & empty
+            doubles = (singles & double_rank) << 8 & empty & allowed
+            left = (free & NOT_FILE_A) << 7 & enemy & allowed
+            right = (free & NOT_FILE_H) << 9 & enemy & allowed
+        else:
+            push = -8
+            double_rank = BLACK_DOUBLE_RANK
+            singles = free >> 8 & empty
+            doubles = (singles & double_rank) >> 8 & empty & allowed
+            left = (free & NOT_FILE_A) >> 9 & enemy & allowed
+            right = (free & NOT_FILE_H) >> 7 & enemy & allowed
+        single_table, left_table, right_table, double_table = PAWN_TABLES[us]
+        singles &= allowed
+        if singles:
+            extend(single_table[singles])
+        if left:
+            extend(left_table[left])
+        if right:
+            extend(right_table[right])
+        if doubles:
+            extend(double_table[doubles])
+
+        # Pinned pieces move only along their pin ray, which a pinned knight never can.
+        for source, ray in pins.items():
+            type_index = self.mailbox[source] - base
+            if type_index != PAWN:
+                if type_index == KNIGHT:
+                    continue
+                targets = 0
+                if type_index != ROOK:
+                    targets |= bishop_attacks(source, occupied)
+                if type_index != BISHOP:
+                    targets |= rook_attacks(source, occupied)
+                targets &= ray & allowed
+                if targets:
+                    extend(MOVE_TABLES[source][targets & empty | (targets & enemy) << 64])
+                continue
+            pawn_allowed = ray & allowed
+            single = source + push
+            if not occupied >> single & 1:
+                if pawn_allowed >> single & 1:
+                    if 1 << single & LAST_RANKS:
+                        for promotion in PROMOTION_CODES:
+                            append(source | single << 6 | PROMOTION << 12 | promotion << 15)
+                    else:
+                        append(source | single << 6 | REGULAR << 12)
+                double = single + push
+                if 1 << single & double_rank and pawn_allowed >> double & 1 and not occupied >> double & 1:
+                    append(source | double << 6 | DOUBLE << 12)
+            targets = PAWN_ATTACKS[us][source] & enemy & pawn_allowed
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                destination = bit.bit_length() - 1
+                if bit & LAST_RANKS:
+                    for promotion in PROMOTION_CODES:
+                        append(source | destination << 6 | PROMOTION << 12 | promotion << 15)
+                else:
+                    append(source | destination << 6 | EAT << 12)
+
+        if self.enpassant is not None:
+            destination = self.enpassant
+            captured = destination - push
+            sources = PAWN_ATTACKS[them][destination] & pawns
+            # During a check the capture has to take the checking pawn or block the checking ray.
+            if checkers and not (checkers >> captured & 1 or check_mask >> destination & 1):
+                sources = 0
+            while sources:
+                bit = sources & -sources
+                sources ^= bit
+                source = bit.bit_length() - 1
+                if source in pins and not pins[source] >> destination & 1:
+                    continue
+                # Both pawns leave the rank of the captured pawn, which can uncover a rook or queen beside the king.
+                if king >> 3 == captured >> 3:
+                    after = occupied ^ bit ^ (1 << captured) | 1 << destination
+                    straight = bitboards[them * 6 + ROOK] | bitboards[them * 6 + QUEEN]
+                    if line_attacks(RANK_LINES[king], after) & straight:
+                        continue
+                append(source | destination << 6 | ENPASSANT << 12)
+        return moves
+
+    def make_move(self, move):
+        """
+        Executes a move and pushes the information needed to take it back.
+        :param move: Integer
+        :return: None
+        """
+        source = move & 63
+        destination = move >> 6 & 63
+        kind = move >> 12 & 7
+        us = self.team
+        captured = None
+        castling = self.castling
+        enpassant = self.enpassant
+        self.enpassant = None
+
+        if kind == CASTLE:
+            for right in TEAM_CASTLING[us]:
+                king, rook, king_destination, rook_destination, _, _ = CASTLING[right]
+                if rook == destination:
+                    self.put(king_destination, self.remove(king))
+                    self.put(rook_destination, self.remove(rook))
+        else:
+            if kind == ENPASSANT:
+                captured = self.remove(destination - 8 if us == 0 else destination + 8)
+            elif self.mailbox[destination] is not None:
+                captured = self.remove(destination)
+            code = self.remove(source)
+            if kind == PROMOTION:
+                code = us * 6 + PROMOTION_PIECES[move >> 15]
+            self.put(destination, code)
+            if kind == DOUBLE:
+                self.enpassant = (source + destination) // 2
+
+        self.history.append((move, castling, enpassant, captured))
+        self.castling &= CASTLING_MASK[source] & CASTLING_MASK[destination]
+        self.team = 1 - us
+
+    def unmake_move(self):
+        """
+        Takes back the last executed move.
+        :return: None
+        """
+        move, self.castling, self.enpassant, captured = self.history.pop()
+        source = move & 63
+        destination = move >> 6 & 63
+        kind = move >> 12 & 7
+        self.team = us = 1 - self.team
+
+        if kind == CASTLE:
+            for right in TEAM_CASTLING[us]:
+                king, rook, king_destination, rook_destination, _, _ = CASTLING[right]
+                if rook == destination:
+                    self.put(king, self.remove(king_destination))
+                    self.put(rook, self.remove(rook_destination))
+        else:
+            code = self.remove(destination)
+            if kind == PROMOTION:
+                code = us * 6 + PAWN
+            self.put(source, code)
+            if kind == ENPASSANT:
+                self.put(destination - 8 if us == 0 else destination + 8, captured)
+            elif captured is not None:
+                self.put(destination, captured)
+
+    def perft(self, depth):
+        """
+        Counts the leaf nodes of the legal move tree to the given depth.
+        :param depth: Integer
+        :return: Integer
+        """
+        moves = self.generate_legal_moves()
+        if depth <= 1:
+            return len(moves) if depth == 1 else 1
+        nodes = 0
+        for move in moves:
+            self.make_move(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+
+def from_chessboard(chessboard, team):
+    """
+    Builds a bitboard position from the chessboard dictionary and the team to move.
+    Castling rights follow the moved flags of kings and rooks on their starting squares and the en passant square
+    follows the double_move flag of the pawn that just moved.
+    :param chessboard: Dict
+    :param team: String
+    :return: Position
+    """
+    position = Position()
+    position.team = TEAMS.index(team)
+    for square in chessboard:
+        placed_piece = chessboard[square].piece
+        if placed_piece is not None:
+            position.put(square_index(square), TEAMS.index(placed_piece.team) * 6 + TYPES.index(placed_piece.type_))
+
+    for right, (king, rook, _, _, _, _) in CASTLING.items():
+        king_piece = chessboard[index_square(king)].piece
+        rook_piece = chessboard[index_square(rook)].piece
+        owner = "w" if right in TEAM_CASTLING[0] else "b"
+        if (
+                king_piece is not None and king_piece.type_ == "king" and king_piece.team == owner and
+                not king_piece.moved and
+                rook_piece is not None and rook_piece.type_ == "rook" and rook_piece.team == owner and
+                not rook_piece.moved
+        ):
+            position.castling |= right
+
+    for square in chessboard:
+        placed_piece = chessboard[square].piece
+        if (
+                placed_piece is not None and
+                placed_piece.type_ == "pawn" and
+                placed_piece.team != team and
+                placed_piece.double_move
+        ):
+            if placed_piece.team == "w":
+                position.enpassant = square_index((square[0], square[1] + 1))
+            else:
+                position.enpassant = square_index((square[0], square[1] - 1))
+    return position
@@ -1,22 +1,60 @@
 """
-Dictionary containing all piece type and team combinations.
+Definition of the chessboard dictionary.
+Dictionary containing all piece team and type combinations, keyed by their names.
 Dictionary containing the default starting placements of all pieces on the board.
+Conversion between square keys and algebraic square names.
 """
 
 
+FILES = "abcdefgh"
+
+
+class Chessboard(dict):
+    """
+    Dictionary of all squares on the board, keyed by (row, col) tuples.
+    Also keeps track of the squares holding each team's pieces and the square of each king, so the rules never have to
+    search the whole board, the squares carrying former move highlights and the pawn that can be taken en passant.
+    The en passant key is the zobrist key of that pawn's file while a pawn of the other team can legally take it, 0
+    otherwise, so equal positions get equal hashes.
+    The history is the undo stack of moves executed by gameplay.make_move.
+    The move highlight flags of all squares are packed into the flags bytearray, see square.Square.
+    The zobrist hash of the position is kept up to date by the gameplay move functions.
+    The halfmove clock counts the moves since the last capture or pawn move, the fullmove number starts at 1 and grows
+    after every move of black, as in FEN.
+    The position hashes hold the hash after every move of the game, the starting position first, to detect repetitions.
+    The material counts the pieces of every type and the bishops on light and dark squares of each team, kept up to
+    date by the captures and promotions.
+    """
+    def __init__(self):
+        super().__init__()
+        self.pieces = {"w": set(), "b": set()}
+        self.kings = {"w": None, "b": None}
+        self.flags = bytearray(64)
+        self.former_moves = []
+        self.enpassant = None
+        self.enpassant_key = 0
+        self.history = []
+        self.hash = 0
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.position_hashes = []
+        self.material = {"w": {}, "b": {}}
+        self.bishop_colors = {"w": [0, 0], "b": [0, 0]}
+
+
 basic_pieces = {
-    "w_king": 'piece.King("w", "king", pygame.image.load("images/w_king.png"))',
-    "b_king": 'piece.King("b", "king", pygame.image.load("images/b_king.png"))',
-    "w_queen": 'piece.Queen("w", "queen", pygame.image.load("images/w_queen.png"))',
-    "b_queen": 'piece.Queen("b", "queen", pygame.image.load("images/b_queen.png"))',
-    "w_bishop": 'piece.Bishop("w", "bishop", pygame.image.load("images/w_bishop.png"))',
-    "b_bishop": 'piece.Bishop("b", "bishop", pygame.image.load("images/b_bishop.png"))',
-    "w_knight": 'piece.Knight("w", "knight", pygame.image.load("images/w_knight.png"))',
-    "b_knight": 'piece.Knight("b", "knight", pygame.image.load("images/b_knight.png"))',
-    "w_rook": 'piece.Rook("w", "rook", pygame.image.load("images/w_rook.png"))',
-    "b_rook": 'piece.Rook("b", "rook", pygame.image.load("images/b_rook.png"))',
-    "w_pawn": 'piece.Pawn("w", "pawn", pygame.image.load("images/w_pawn.png"))',
-    "b_pawn": 'piece.Pawn("b", "pawn", pygame.image.load("images/b_pawn.png"))'
+    "w_king": ("w", "king"),
+    "b_king": ("b", "king"),
+    "w_queen": ("w", "queen"),
+    "b_queen": ("b", "queen"),
+    "w_bishop": ("w", "bishop"),
+    "b_bishop": ("b", "bishop"),
+    "w_knight": ("w", "knight"),
+    "b_knight": ("b", "knight"),
+    "w_rook": ("w", "rook"),
+    "b_rook": ("b", "rook"),
+    "w_pawn": ("w", "pawn"),
+    "b_pawn": ("b", "pawn")
 }
 
 
@@ -45,3 +83,21 @@ default_starting_placement = {
     (0, 7): "w_rook", (1, 7): "w_knight", (2, 7): "w_bishop", (3, 7): "w_queen",
     (4, 7): "w_king", (5, 7): "w_bishop", (6, 7): "w_knight", (7, 7): "w_rook"
 }
+
+
+def square_name(square):
+    """
+    Converts a chessboard dictionary key to an algebraic square name such as "e2".
+    :param square: Tuple
+    :return: String
+    """
+    return FILES[square[0]] + str(8 - square[1])
+
+
+def square_from_name(name):
+    """
+    Converts an algebraic square name such as "e2" to a chessboard dictionary key.
+    :param name: String
+    :return: Tuple
+    """
+    return FILES.index(name[0]), 8 - int(name[1])
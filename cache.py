@@ -0,0 +1,172 @@
+"""
+Bounded cache of the legal moves and check status of positions, keyed by their zobrist hash.
+Entries live in packed arrays, every move is encoded as a single integer, so the memory use is bounded by the
+capacity; the move storage grows one slot at a time up to it. The least recently used entry is evicted when the
+cache is full.
+"""
+
+
+from array import array
+import move as mv
+
+
+# Slot size, the most legal moves of a position reachable in a game; set up positions can have more.
+MAX_MOVES = 218
+SQUARES = [(index // 8, index % 8) for index in range(64)]
+KINDS = ["regular_move", "eat_move", "double_move", "castle_move", "enpassant_move", "promotion_move"]
+PROMOTIONS = [None, "queen", "rook", "bishop", "knight"]
+# Move storage added for a newly taken slot.
+EMPTY_SLOT = array("I", [0]) * MAX_MOVES
+
+
+def encode_move(move):
+    """
+    Packs a move into an integer: source and destination squares in 6 bits each, kind and promotion in 3 bits each.
+    :param move: move.Move
+    :return: Integer
+    """
+    return (
+        (move.source[0] * 8 + move.source[1]) |
+        (move.destination[0] * 8 + move.destination[1]) << 6 |
+        KINDS.index(move.kind) << 12 |
+        PROMOTIONS.index(move.promotion) << 15
+    )
+
+
+def decode_move(code):
+    """
+    Unpacks a move encoded by encode_move.
+    :param code: Integer
+    :return: move.Move
+    """
+    return mv.Move(SQUARES[code & 63], SQUARES[code >> 6 & 63], KINDS[code >> 12 & 7], PROMOTIONS[code >> 15 & 7])
+
+
+class PositionCache:
+    """
+    Fixed-size cache of legal move lists and check status per position hash, with least recently used eviction.
+    The slots form a doubly linked list from the most to the least recently used one, kept in packed arrays of slot
+    numbers, and the move storage of a slot is allocated when the slot is first taken.
+    Counts hits, misses and evictions.
+    """
+    def __init__(self, capacity=4096):
+        """
+        :param capacity: Integer, number of positions kept
+        """
+        self.capacity = capacity
+        self.counts = array("H", [0]) * capacity
+        self.checks = bytearray(capacity)
+        self.keys = array("Q", [0]) * capacity
+        self.newer = array("i", [-1]) * capacity
+        self.older = array("i", [-1]) * capacity
+        self.newest = self.oldest = -1
+        self.moves = array("I")
+        self.slots = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def unlink(self, slot):
+        """
+        Takes a slot out of the recently used list.
+        :param slot: Integer
+        :return: None
+        """
+        newer, older = self.newer[slot], self.older[slot]
+        if newer == -1:
+            self.newest = older
+        else:
+            self.older[newer] = older
+        if older == -1:
+            self.oldest = newer
+        else:
+            self.newer[older] = newer
+
+    def push(self, slot):
+        """
+        Puts a slot at the most recently used end of the list.
+        :param slot: Integer
+        :return: None
+        """
+        self.newer[slot] = -1
+        self.older[slot] = self.newest
+        if self.newest == -1:
+            self.oldest = slot
+        else:
+            self.newer[self.newest] = slot
+        self.newest = slot
+
+    def get(self, key):
+        """
+        Returns the legal moves and check status stored for a position, or None when it is not cached.
+        :param key: Integer
+        :return: Tuple or None
+        """
+        slot = self.slots.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        if slot != self.newest:
+            self.unlink(slot)
+            self.push(slot)
+        self.hits += 1
+        start = slot * MAX_MOVES
+        codes = self.moves[start:start + self.counts[slot]]
+        return [decode_move(code) for code in codes], bool(self.checks[slot])
+
+    def put(self, key, moves, in_check):
+        """
+        Stores the legal moves and check status of a position, evicting the least recently used entry when full.
+        Positions with more than MAX_MOVES moves do not fit into a slot and are not cached.
+        :param key: Integer
+        :param moves: List
+        :param in_check: Bool
+        :return: None
+        """
+        if len(moves) > MAX_MOVES:
+            return
+        slot = self.slots.get(key)
+        if slot is not None:
+            self.unlink(slot)
+        elif len(self.slots) < self.capacity:
+            slot = len(self.slots)
+            if len(self.moves) == slot * MAX_MOVES:
+                self.moves.extend(EMPTY_SLOT)
+        else:
+            slot = self.oldest
+            self.unlink(slot)
+            del self.slots[self.keys[slot]]
+            self.evictions += 1
+        self.slots[key] = slot
+        self.keys[slot] = key
+        self.push(slot)
+
+        start = slot * MAX_MOVES
+        self.counts[slot] = len(moves)
+        self.checks[slot] = in_check
+        self.moves[start:start + len(moves)] = array("I", [encode_move(move) for move in moves])
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters. The allocated move storage is kept for the next entries.
+        :return: None
+        """
+        self.slots.clear()
+        self.newest = self.oldest = -1
+        self.hits = self.misses = self.evictions = 0
+
+    def statistics(self):
+        """
+        Returns the hit, miss and eviction counters, the number of entries and the size of the packed arrays.
+        :return: Dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.slots),
+            "capacity": self.capacity,
+            "bytes": sum(
+                values.itemsize * len(values) for values in [self.counts, self.keys, self.newer, self.older, self.moves]
+            ) + len(self.checks)
+        }
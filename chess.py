@@ -3,80 +3,345 @@ Main game file.
 """
 
 
+import argparse
+import json
+import statistics
 import sys
+import time
 import pygame
 import graphics as gui
+import board as brd
+import engine
 import gameplay as gpl
 import globals as glb
+import move as mv
+import profiling
 
 
-def chess():
+def play_computer_move(chessboard, team, time_budget):
+    """
+    Lets the computer search for and execute a move for the team and prints the search statistics.
+    :param chessboard: Dict
+    :param team: String
+    :param time_budget: Float
+    :return: move.Move
+    """
+    result = engine.search(chessboard, team, time_budget)
+    move = result["move"]
+    print("{} plays {}{}: depth {}, score {}, {} nodes in {:.2f} s, {:.0f} nodes/s".format(
+        team, brd.square_name(move.source), brd.square_name(move.destination), result["depth"], result["score"],
+        result["nodes"], result["time"], result["nps"]
+    ))
+    gpl.clear_selection_highlight(chessboard)
+    gpl.make_move(chessboard, move)
+    return move
+
+
+def wait_for_events(metrics, block):
+    """
+    Returns the pending events, blocking until one arrives when block is set.
+    Time and processor time spent blocked are counted as idle in the metrics.
+    :param metrics: Dict
+    :param block: Bool
+    :return: List
+    """
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    events = [pygame.event.wait()] if block else []
+    events += pygame.event.get()
+    now = time.perf_counter()
+    metrics["idle_time"] += now - wall
+    metrics["idle_cpu"] += time.process_time() - cpu
+    if events:
+        metrics["received"] = now
+    return events
+
+
+def draw_frame(win, chessboard, metrics, clock, fps):
+    """
+    Draws the changes of the chessboard and limits the frame rate.
+    A frame that answers input records the latency from receiving the input to the updated display.
+    The profiling overlay is drawn on top when it is shown.
+    :param win: pygame.Surface
+    :param chessboard: Dict
+    :param metrics: Dict
+    :param clock: pygame.time.Clock
+    :param fps: Integer, 0 for no limit
+    :return: None
+    """
+    gui.draw_chessboard(win, chessboard)
+    if metrics["overlay"]:
+        gui.draw_overlay(win, profiling.report_lines() or ["no profiled calls yet"])
+    metrics["frames"] += 1
+    if metrics["received"] is not None:
+        metrics["latencies"].append(time.perf_counter() - metrics["received"])
+        metrics["received"] = None
+    clock.tick(fps)
+
+
+def print_metrics(metrics):
+    """
+    Prints the drawn frames, the latency from input to frame and the processor usage while idle and overall.
+    :param metrics: Dict
+    :return: None
+    """
+    wall = time.perf_counter() - metrics["start_time"]
+    cpu = time.process_time() - metrics["start_cpu"]
+    latencies = metrics["latencies"] or [0.0]
+    print("frames drawn: {}, {} of them answering input".format(metrics["frames"], len(metrics["latencies"])))
+    print("input to frame latency: median {:.2f} ms, max {:.2f} ms".format(
+        statistics.median(latencies) * 1000, max(latencies) * 1000
+    ))
+    print("idle: {:.1f} s of {:.1f} s, cpu usage while idle {:.2f} %, overall {:.2f} %".format(
+        metrics["idle_time"], wall,
+        100 * metrics["idle_cpu"] / metrics["idle_time"] if metrics["idle_time"] else 0.0,
+        100 * cpu / wall if wall else 0.0
+    ))
+
+
+def undo_move(chessboard, team, computer, redo_moves):
+    """
+    Takes back moves until it is the turn of a team played by a human again, keeping them for redo.
+    :param chessboard: Dict
+    :param team: String
+    :param computer: List
+    :param redo_moves: List
+    :return: String, the team to move
+    """
+    while chessboard.history:
+        redo_moves.append(gpl.unmake_move(chessboard))
+        team = gpl.switch_active_team(team)
+        if team not in computer:
+            break
+    return team
+
+
+def redo_move(chessboard, team, computer, redo_moves):
+    """
+    Executes the moves taken back by undo_move again, until it is the turn of a team played by a human.
+    :param chessboard: Dict
+    :param team: String
+    :param computer: List
+    :param redo_moves: List
+    :return: String, the team to move
+    """
+    while redo_moves:
+        gpl.make_move(chessboard, redo_moves.pop())
+        team = gpl.switch_active_team(team)
+        if team not in computer:
+            break
+    return team
+
+
+def new_game():
+    """
+    Returns the state of a new game besides the chessboard: the team to move, the end result, the pending promotion,
+    the selected piece and the moves that can be redone.
+    :return: Dict
+    """
+    return {"team": "w", "end": "", "promotion_in_progress": False, "selected_piece": None, "redo_moves": []}
+
+
+def end_turn(chessboard, state):
+    """
+    Passes the turn to the other team and checks whether the game ended by checkmate, stalemate, insufficient
+    material or a draw by repetition or the fifty-move rule.
+    :param chessboard: Dict
+    :param state: Dict
+    :return: String, the end result or an empty string
+    """
+    state["team"] = gpl.switch_active_team(state["team"])
+    state["end"] = (
+        gpl.is_checkmate_stalemate(chessboard, state["team"]) or gpl.is_insufficient_material(chessboard) or
+        gpl.is_draw(chessboard)
+    )
+    return state["end"]
+
+
+def click_square(chessboard, state, clicked_square):
+    """
+    Handles a click of the human player on a square: selecting a piece, moving it or choosing a promoted piece.
+    :param chessboard: Dict
+    :param state: Dict
+    :param clicked_square: Tuple
+    :return: String, what the click did: "select", "move", "promotion", "choice" or "none"
+    """
+    if state["promotion_in_progress"]:
+        if not chessboard[clicked_square].promotion_in_progress:
+            return "none"
+        promotion_field, choice = gui.reset_promotion_display(chessboard, clicked_square)
+        gpl.do_promotion_resolve(chessboard, promotion_field, choice)
+        state["promotion_in_progress"] = False
+        end_turn(chessboard, state)
+        return "choice"
+
+    if gpl.is_any_piece_selected(chessboard) and (
+            chessboard[clicked_square].regular_move or
+            chessboard[clicked_square].eat_move or
+            chessboard[clicked_square].special_move
+    ):
+        kind = gpl.get_move_kind(chessboard, clicked_square)
+        gpl.make_move(chessboard, mv.Move(state["selected_piece"], clicked_square, kind))
+        state["redo_moves"].clear()
+        gpl.clear_selection_highlight(chessboard)
+        if kind == "promotion_move":
+            gui.set_promotion_display(chessboard, clicked_square)
+            state["promotion_in_progress"] = True
+            return "promotion"
+        end_turn(chessboard, state)
+        return "move"
+
+    gpl.clear_selection_highlight(chessboard)
+    if chessboard[clicked_square].piece is None:
+        return "none"
+    state["selected_piece"] = clicked_square
+    gpl.highlight_potential_moves(chessboard, clicked_square, state["team"])
+    return "select"
+
+
+def save_session(path, size, computer, events):
+    """
+    Writes the recorded input of a game to a JSON file that replay.py plays back.
+    Events are clicks as ["click", x, y], ["undo"], ["redo"], window size changes as ["resize", width, height] and the
+    computer moves as ["computer", source, destination, kind, promotion].
+    :param path: String
+    :param size: Tuple, window size at the start of the game
+    :param computer: List
+    :param events: List
+    :return: None
+    """
+    with open(path, "w") as file:
+        json.dump({"size": list(size), "computer": list(computer), "events": events}, file)
+
+
+def quit_game(metrics, show_metrics, profile=None, record=None, session=None):
+    """
+    Closes the window and exits, printing the metrics, writing the profiling statistics and the recorded session
+    when asked to.
+    :param metrics: Dict
+    :param show_metrics: Bool
+    :param profile: String, path of the JSON file for the profiling statistics
+    :param record: String, path of the JSON file for the recorded session
+    :param session: Dict, arguments of save_session
+    :return: None
+    """
+    if show_metrics:
+        print_metrics(metrics)
+    if profile:
+        profiling.dump(profile)
+    if record:
+        save_session(record, **session)
+    pygame.quit()
+    sys.exit(0)
+
+
+def chess(computer=(), time_budget=1.0, fps=60, show_metrics=False, resizable=False, profile=None, record=None):
     """
     Main game thread.
+    The loop sleeps until input arrives and draws a frame only after the state of the game changed.
+    With profiling, F3 toggles the overlay of the statistics.
+    :param computer: List of teams played by the computer
+    :param time_budget: Float, seconds the computer may think per move
+    :param fps: Integer, maximal frames per second, 0 for no limit
+    :param show_metrics: Bool, print frame latency and cpu usage when the game is closed
+    :param resizable: Bool, let the board follow the size of the window
+    :param profile: String, profile the hot functions and write their statistics to this JSON file on exit
+    :param record: String, record the clicks, undos, redos, window size changes and computer moves to this JSON file
+        on exit
     :return: None
     """
-    WIN = pygame.display.set_mode((glb.BOARDWIDTH, glb.BOARDWIDTH))
+    if profile:
+        profiling.instrument(gpl)
+        profiling.instrument(gui)
+    WIN = pygame.display.set_mode((glb.BOARDWIDTH, glb.BOARDWIDTH), pygame.RESIZABLE if resizable else 0)
     pygame.display.set_caption("CHESS")
+    gui.load_sprites()
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(
+        [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED]
+    )
+    clock = pygame.time.Clock()
+    metrics = {
+        "start_time": time.perf_counter(), "start_cpu": time.process_time(), "received": None,
+        "idle_time": 0.0, "idle_cpu": 0.0, "frames": 0, "latencies": [], "overlay": False
+    }
+    session = {"size": WIN.get_size(), "computer": computer, "events": []}
 
     game = True
-    team = "w"
-    end = ""
-    promotion_in_progress = False
-    chessboard = {}
+    state = new_game()
+    chessboard = brd.Chessboard()
     gpl.populate_chessboard(chessboard)
+    draw_frame(WIN, chessboard, metrics, clock, fps)
 
     while game:
-        for event in pygame.event.get():
+        changed = False
+        for event in wait_for_events(metrics, state["team"] not in computer):
             if event.type == pygame.QUIT:
                 game = False
-                pygame.quit()
-                sys.exit(0)
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                clicked_square = gui.get_clicked_square()
-                if promotion_in_progress:
-                    if chessboard[clicked_square].promotion_in_progress:
-                        gpl.do_promotion_resolve(chessboard, clicked_square)
-                        promotion_in_progress = False
-                        team = gpl.switch_active_team(team)
-                        end = gpl.is_checkmate_stalemate(chessboard, team)
-                        if end:
-                            game = False
-                else:
-                    if gpl.is_any_piece_selected(chessboard):
-                        if (
-                                chessboard[clicked_square].regular_move or
-                                chessboard[clicked_square].eat_move or
-                                chessboard[clicked_square].special_move
-                        ):
-                            gpl.do_move(chessboard, selected_piece, clicked_square)
-                            gpl.clear_selection_highlight(chessboard)
-                            if chessboard[clicked_square].promotion_in_progress:
-                                promotion_in_progress = True
-                            else:
-                                team = gpl.switch_active_team(team)
-                                end = gpl.is_checkmate_stalemate(chessboard, team)
-                                if end:
-                                    game = False
-                        else:
-                            gpl.clear_selection_highlight(chessboard)
-                            if chessboard[clicked_square].piece is not None:
-                                selected_piece = clicked_square
-                                gpl.highlight_potential_moves(chessboard, clicked_square, team)
+                quit_game(metrics, show_metrics, profile, record, session)
+            if event.type in [pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED]:
+                gui.invalidate_chessboard()
+                changed = True
+            if event.type == pygame.WINDOWSIZECHANGED:
+                session["events"].append(["resize", event.x, event.y])
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profile:
+                metrics["overlay"] = not metrics["overlay"]
+                gui.invalidate_chessboard()
+                changed = True
+            if (
+                    event.type == pygame.KEYDOWN and event.mod & pygame.KMOD_CTRL and
+                    state["team"] not in computer and not state["promotion_in_progress"]
+            ):
+                if event.key in [pygame.K_z, pygame.K_y]:
+                    gpl.clear_selection_highlight(chessboard)
+                    if event.key == pygame.K_z:
+                        state["team"] = undo_move(chessboard, state["team"], computer, state["redo_moves"])
+                        session["events"].append(["undo"])
                     else:
-                        if chessboard[clicked_square].piece is not None:
-                            selected_piece = clicked_square
-                            gpl.highlight_potential_moves(chessboard, clicked_square, team)
-        gui.draw_chessboard(WIN, chessboard)
+                        state["team"] = redo_move(chessboard, state["team"], computer, state["redo_moves"])
+                        session["events"].append(["redo"])
+                    changed = True
+            if event.type == pygame.MOUSEBUTTONDOWN and state["team"] not in computer:
+                changed = True
+                session["events"].append(["click", event.pos[0], event.pos[1]])
+                click_square(chessboard, state, gui.get_clicked_square(event.pos))
+                if state["end"]:
+                    game = False
+
+        if game and state["team"] in computer:
+            metrics["received"] = None
+            move = play_computer_move(chessboard, state["team"], time_budget)
+            session["events"].append(["computer", move.source, move.destination, move.kind, move.promotion])
+            state["redo_moves"].clear()
+            if end_turn(chessboard, state):
+                game = False
+            changed = True
+        if changed:
+            draw_frame(WIN, chessboard, metrics, clock, fps)
 
-    gui.draw_chessboard(WIN, chessboard)
-    gui.draw_end_prompt(WIN, end)
+    gui.draw_end_prompt(WIN, state["end"])
 
     while not game:
-        for event in pygame.event.get():
+        for event in wait_for_events(metrics, True):
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit(0)
+                quit_game(metrics, show_metrics, profile, record, session)
+            if event.type in [pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED]:
+                gui.invalidate_chessboard()
+                gui.draw_chessboard(WIN, chessboard)
+                gui.draw_end_prompt(WIN, state["end"])
 
 
 if __name__ == '__main__':
-    chess()
+    parser = argparse.ArgumentParser(description="Game of chess for two players or against the computer.")
+    parser.add_argument("--computer", nargs="*", default=[], choices=["w", "b"], help="teams played by the computer")
+    parser.add_argument("--time", type=float, default=1.0, help="seconds the computer may think per move")
+    parser.add_argument("--fps", type=int, default=60, help="maximal frames per second, 0 for no limit")
+    parser.add_argument("--metrics", action="store_true", help="print frame latency and cpu usage on exit")
+    parser.add_argument("--resizable", action="store_true", help="scale the board with the window")
+    parser.add_argument(
+        "--profile", nargs="?", const="profile.json", metavar="FILE",
+        help="profile the hot functions, F3 shows the statistics, written to FILE as JSON on exit"
+    )
+    parser.add_argument("--record", metavar="FILE", help="record the input of the game to FILE for replay.py")
+    args = parser.parse_args()
+    chess(args.computer, args.time, args.fps, args.metrics, args.resizable, args.profile, args.record)
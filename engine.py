@@ -0,0 +1,232 @@
+"""
+Computer opponent built on the gameplay rules.
+Negamax alpha-beta search with iterative deepening, quiescence search on captures and a hard time budget per move.
+"""
+
+
+import time
+import gameplay as gpl
+
+
+MATE = 100000
+PIECE_VALUES = {"pawn": 100, "knight": 320, "bishop": 330, "rook": 500, "queen": 900, "king": 0}
+CENTER_BONUS = {"knight": 6, "bishop": 3, "queen": 1, "king": 0, "rook": 0, "pawn": 0}
+TIME_CHECK_INTERVAL = 16
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget of the move is spent.
+    """
+
+
+def evaluate(chessboard, team):
+    """
+    Scores the position from the point of view of the team: material, centralisation and pawn advancement.
+    :param chessboard: Dict
+    :param team: String
+    :return: Integer
+    """
+    score = 0
+    for side, sign in [(team, 1), (gpl.switch_active_team(team), -1)]:
+        for square in chessboard.pieces[side]:
+            placed_piece = chessboard[square].piece
+            value = PIECE_VALUES[placed_piece.type_]
+            value -= CENTER_BONUS[placed_piece.type_] * int(abs(3.5 - square[0]) + abs(3.5 - square[1]))
+            if placed_piece.type_ == "pawn":
+                value += 8 * (6 - square[1] if side == "w" else square[1] - 1)
+            score += sign * value
+    return score
+
+
+def is_capture(chessboard, move):
+    """
+    Tests if a move captures a piece or promotes a pawn.
+    :param chessboard: Dict
+    :param move: move.Move
+    :return: Bool
+    """
+    return (
+            chessboard[move.destination].piece is not None and move.kind != "castle_move" or
+            move.kind in ["enpassant_move", "promotion_move"]
+    )
+
+
+def order_moves(chessboard, moves, best_move):
+    """
+    Sorts moves so that the best move of an earlier search comes first, then captures of the most valuable
+    pieces by the least valuable attackers.
+    :param chessboard: Dict
+    :param moves: List
+    :param best_move: move.Move
+    :return: None
+    """
+    def priority(move):
+        if move == best_move:
+            return -MATE
+        score = 0
+        if move.promotion is not None:
+            score -= PIECE_VALUES[move.promotion]
+        if chessboard[move.destination].piece is not None and move.kind != "castle_move":
+            score -= 10 * PIECE_VALUES[chessboard[move.destination].piece.type_]
+            score += PIECE_VALUES[chessboard[move.source].piece.type_] // 10
+        return score
+    moves.sort(key=priority)
+
+
+def count_node(state):
+    """
+    Counts a searched node and stops the search once the deadline has passed.
+    :param state: Dict
+    :return: None
+    """
+    state["nodes"] += 1
+    if state["nodes"] % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > state["deadline"]:
+        raise SearchTimeout()
+
+
+def quiescence(state, chessboard, team, alpha, beta):
+    """
+    Searches only captures and promotions until the position is quiet, so the evaluation is not taken in the middle
+    of an exchange.
+    :param state: Dict
+    :param chessboard: Dict
+    :param team: String
+    :param alpha: Integer
+    :param beta: Integer
+    :return: Integer
+    """
+    count_node(state)
+    stand_pat = evaluate(chessboard, team)
+    if stand_pat >= beta:
+        return beta
+    alpha = max(alpha, stand_pat)
+
+    captures = [move for move in gpl.get_legal_moves(chessboard, team)[0] if is_capture(chessboard, move)]
+    order_moves(chessboard, captures, None)
+    for move in captures:
+        gpl.make_move(chessboard, move)
+        try:
+            score = -quiescence(state, chessboard, gpl.switch_active_team(team), -beta, -alpha)
+        finally:
+            gpl.unmake_move(chessboard)
+        if score >= beta:
+            return beta
+        alpha = max(alpha, score)
+    return alpha
+
+
+def negamax(state, chessboard, team, depth, alpha, beta, ply):
+    """
+    Alpha-beta search of the position to the given depth, scored from the point of view of the team.
+    :param state: Dict
+    :param chessboard: Dict
+    :param team: String
+    :param depth: Integer
+    :param alpha: Integer
+    :param beta: Integer
+    :param ply: Integer
+    :return: Integer
+    """
+    if depth <= 0:
+        return quiescence(state, chessboard, team, alpha, beta)
+    count_node(state)
+
+    moves, in_check = gpl.get_legal_moves(chessboard, team)
+    if not moves:
+        if in_check:
+            return -MATE + ply
+        return 0
+
+    position_hash = chessboard.hash
+    order_moves(chessboard, moves, state["best_moves"].get(position_hash))
+    best_move = None
+    for move in moves:
+        gpl.make_move(chessboard, move)
+        try:
+            score = -negamax(state, chessboard, gpl.switch_active_team(team), depth - 1, -beta, -alpha, ply + 1)
+        finally:
+            gpl.unmake_move(chessboard)
+        if score > alpha:
+            alpha = score
+            best_move = move
+        if alpha >= beta:
+            break
+
+    if best_move is not None:
+        state["best_moves"][position_hash] = best_move
+    return alpha
+
+
+def search_root(state, chessboard, team, depth, moves):
+    """
+    Searches every root move to the given depth and returns the best move with its score.
+    If the time budget runs out, the best move among the completely searched root moves is kept in the state.
+    :param state: Dict
+    :param chessboard: Dict
+    :param team: String
+    :param depth: Integer
+    :param moves: List
+    :return: Tuple
+    """
+    alpha = -MATE - 1
+    best_move = None
+    for move in moves:
+        gpl.make_move(chessboard, move)
+        try:
+            score = -negamax(state, chessboard, gpl.switch_active_team(team), depth - 1, -MATE - 1, -alpha, 1)
+        finally:
+            gpl.unmake_move(chessboard)
+        if score > alpha:
+            alpha = score
+            best_move = move
+            state["partial"] = (best_move, alpha)
+    return best_move, alpha
+
+
+def search(chessboard, team, time_budget=1.0, max_depth=64, report=None):
+    """
+    Finds a move for the team by iterative deepening until the time budget or the maximal depth is reached.
+    Returns the chosen move with the score, depth reached, searched nodes, elapsed time and nodes per second.
+    :param chessboard: Dict
+    :param team: String
+    :param time_budget: Float, seconds
+    :param max_depth: Integer
+    :param report: Function called with the result of every completed depth
+    :return: Dict
+    """
+    start = time.perf_counter()
+    state = {"nodes": 0, "deadline": start + time_budget, "best_moves": {}, "partial": None}
+    moves = gpl.get_legal_moves(chessboard, team)[0]
+    result = {"move": moves[0] if moves else None, "score": 0, "depth": 0}
+
+    for depth in range(1, max_depth + 1):
+        if not moves:
+            break
+        state["partial"] = None
+        order_moves(chessboard, moves, result["move"])
+        try:
+            move, score = search_root(state, chessboard, team, depth, moves)
+        except SearchTimeout:
+            if state["partial"] is not None:
+                result["move"], result["score"] = state["partial"]
+            break
+        result.update(move=move, score=score, depth=depth)
+        if report is not None:
+            report(dict(result, **statistics(state, start)))
+        if abs(score) >= MATE - max_depth or len(moves) == 1:
+            break
+
+    result.update(statistics(state, start))
+    return result
+
+
+def statistics(state, start):
+    """
+    Returns the node count, elapsed time and nodes per second of a search.
+    :param state: Dict
+    :param start: Float
+    :return: Dict
+    """
+    elapsed = time.perf_counter() - start
+    return {"nodes": state["nodes"], "time": elapsed, "nps": state["nodes"] / elapsed if elapsed else 0.0}
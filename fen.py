@@ -0,0 +1,192 @@
+"""
+Forsyth-Edwards Notation (FEN) import and export of chessboard positions.
+A record holds the piece placement, the team to move, the castling rights, the en passant target square and the
+halfmove clock and fullmove number; records without the two counters, as in EPD, are accepted too.
+"""
+
+
+import board as brd
+import gameplay as gpl
+import piece
+import zobrist
+
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECE_LETTERS = {"k": "king", "q": "queen", "r": "rook", "b": "bishop", "n": "knight", "p": "pawn"}
+TYPE_LETTERS = {type_: letter for letter, type_ in PIECE_LETTERS.items()}
+# FEN letter: (team, type), upper case letters are white pieces.
+LETTER_PIECES = dict(
+    [(letter.upper(), ("w", type_)) for letter, type_ in PIECE_LETTERS.items()] +
+    [(letter, ("b", type_)) for letter, type_ in PIECE_LETTERS.items()]
+)
+
+# Castling right letter in the order of the zobrist.castling_rights bits.
+CASTLING_LETTERS = "KQkq"
+
+
+def parse_fen(record):
+    """
+    Splits a FEN record into its fields and checks them.
+    :param record: String
+    :return: Dict with the placement as {square: (team, type)}, team, castling, enpassant target square or None,
+        halfmove and fullmove
+    """
+    fields = record.split()
+    if len(fields) not in [4, 6]:
+        raise ValueError("FEN needs 4 or 6 fields, got {}: {!r}".format(len(fields), record))
+    ranks = fields[0].split("/")
+    if len(ranks) != 8:
+        raise ValueError("FEN placement needs 8 ranks: {!r}".format(fields[0]))
+
+    placement = {}
+    kings = {"w": 0, "b": 0}
+    for col, rank in enumerate(ranks):
+        row = 0
+        for letter in rank:
+            if letter in "12345678":
+                row += int(letter)
+                continue
+            placed_piece = LETTER_PIECES.get(letter)
+            if placed_piece is None or row > 7:
+                raise ValueError("FEN rank {!r} is not valid".format(rank))
+            if placed_piece[1] == "king":
+                kings[placed_piece[0]] += 1
+            placement[(row, col)] = placed_piece
+            row += 1
+        if row != 8:
+            raise ValueError("FEN rank {!r} does not cover 8 squares".format(rank))
+    if kings != {"w": 1, "b": 1}:
+        raise ValueError("FEN placement needs one king per team: {!r}".format(fields[0]))
+
+    if fields[1] not in ["w", "b"]:
+        raise ValueError("FEN team to move must be w or b: {!r}".format(fields[1]))
+    castling = "" if fields[2] == "-" else fields[2]
+    if any(letter not in CASTLING_LETTERS or castling.count(letter) > 1 for letter in castling):
+        raise ValueError("FEN castling rights are not valid: {!r}".format(fields[2]))
+    for letter in castling:
+        king, rook = zobrist.CASTLING_SQUARES[CASTLING_LETTERS.index(letter)]
+        team = "w" if letter.isupper() else "b"
+        if placement.get(king) != (team, "king") or placement.get(rook) != (team, "rook"):
+            raise ValueError("FEN castling right {} without its king and rook in place".format(letter))
+
+    enpassant = None
+    if fields[3] != "-":
+        rank = "6" if fields[1] == "w" else "3"
+        if len(fields[3]) != 2 or fields[3][0] not in brd.FILES or fields[3][1] != rank:
+            raise ValueError("FEN en passant square is not valid: {!r}".format(fields[3]))
+        enpassant = brd.square_from_name(fields[3])
+
+    try:
+        halfmove, fullmove = [int(field) for field in fields[4:]] or [0, 1]
+    except ValueError:
+        raise ValueError("FEN move counters must be numbers: {!r}".format(" ".join(fields[4:])))
+
+    return {
+        "placement": placement, "team": fields[1], "castling": castling, "enpassant": enpassant,
+        "halfmove": halfmove, "fullmove": fullmove
+    }
+
+
+def clear_chessboard(chessboard):
+    """
+    Removes all pieces, highlights and history from a populated chessboard, keeping its squares.
+    The hash is left for the caller to compute.
+    :param chessboard: board.Chessboard
+    :return: None
+    """
+    for team in ["w", "b"]:
+        for square in chessboard.pieces[team]:
+            chessboard[square].piece = None
+        chessboard.pieces[team] = set()
+    for square in chessboard.former_moves:
+        chessboard[square].former_move = False
+    gpl.clear_selection_highlight(chessboard)
+    chessboard.former_moves = []
+    chessboard.enpassant = None
+    chessboard.enpassant_key = 0
+    chessboard.history = []
+
+
+def load_fen(record, chessboard=None):
+    """
+    Sets up the position of a FEN record and returns the chessboard and the team to move.
+    A given populated chessboard is reused, which saves building its squares when many positions are loaded.
+    :param record: String
+    :param chessboard: board.Chessboard
+    :return: Tuple
+    """
+    fields = parse_fen(record)
+    if chessboard is None:
+        chessboard = brd.Chessboard()
+        gpl.populate_chessboard(chessboard, {})
+    else:
+        clear_chessboard(chessboard)
+
+    for square, (team, type_) in fields["placement"].items():
+        placed_piece = piece.create_piece(team, type_)
+        if type_ in ["king", "rook"]:
+            placed_piece.moved = True
+            if type_ == "king":
+                chessboard.kings[team] = square
+        chessboard[square].piece = placed_piece
+        chessboard.pieces[team].add(square)
+    for letter in fields["castling"]:
+        for square in zobrist.CASTLING_SQUARES[CASTLING_LETTERS.index(letter)]:
+            chessboard[square].piece.moved = False
+
+    target = fields["enpassant"]
+    if target is not None:
+        pawn = (target[0], target[1] + 1) if fields["team"] == "w" else (target[0], target[1] - 1)
+        moved_pawn = chessboard[pawn].piece
+        if moved_pawn is None or moved_pawn.type_ != "pawn" or moved_pawn.team == fields["team"]:
+            raise ValueError("FEN en passant square {} without the pawn that moved".format(brd.square_name(target)))
+        chessboard.enpassant = pawn
+        moved_pawn.double_move = True
+        chessboard.enpassant_key = gpl.get_enpassant_key(chessboard, pawn)
+
+    chessboard.halfmove_clock = fields["halfmove"]
+    chessboard.fullmove_number = fields["fullmove"]
+    chessboard.hash = zobrist.compute_hash(chessboard, fields["team"])
+    chessboard.position_hashes = [chessboard.hash]
+    gpl.count_material(chessboard)
+    return chessboard, fields["team"]
+
+
+def to_fen(chessboard, team):
+    """
+    Writes the position of a chessboard with the team to move as a FEN record.
+    :param chessboard: board.Chessboard
+    :param team: String
+    :return: String
+    """
+    ranks = []
+    for col in range(8):
+        rank = ""
+        empty = 0
+        for row in range(8):
+            placed_piece = chessboard[(row, col)].piece
+            if placed_piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = TYPE_LETTERS[placed_piece.type_]
+            rank += letter.upper() if placed_piece.team == "w" else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+
+    rights = zobrist.castling_rights(chessboard)
+    castling = "".join(letter for bit, letter in enumerate(CASTLING_LETTERS) if rights & 1 << bit) or "-"
+
+    enpassant = "-"
+    if chessboard.enpassant is not None:
+        pawn = chessboard.enpassant
+        direction = 1 if chessboard[pawn].piece.team == "w" else -1
+        enpassant = brd.square_name((pawn[0], pawn[1] + direction))
+
+    return "{} {} {} {} {} {}".format(
+        "/".join(ranks), team, castling, enpassant, chessboard.halfmove_clock, chessboard.fullmove_number
+    )
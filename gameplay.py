@@ -1,21 +1,40 @@
 """
 Definitions of all functions that will be handling gameplay.
+The rules are headless: this module must not import pygame or the gui so that it can run in server processes.
 """
 
-import pygame
-import graphics as gui
+import cache
 import piece
+import move as mv
 import square as sq
 import board as brd
 import globals as glb
+import zobrist
 
 
-def populate_chessboard(chessboard):
+PROMOTION_CHOICES = ["queen", "rook", "bishop", "knight"]
+PIECE_ORDER = ["king", "knight", "pawn", "bishop", "rook", "queen"]
+MOVE_KINDS = ["promotion_move", "castle_move", "enpassant_move", "double_move", "eat_move", "regular_move"]
+MOVE_FLAGS = {
+    "regular_move": sq.REGULAR_MOVE, "eat_move": sq.EAT_MOVE, "double_move": sq.DOUBLE_MOVE | sq.SPECIAL_MOVE,
+    "castle_move": sq.CASTLE_MOVE | sq.SPECIAL_MOVE, "enpassant_move": sq.ENPASSANT_MOVE | sq.SPECIAL_MOVE,
+    "promotion_move": sq.PROMOTION_MOVE | sq.SPECIAL_MOVE
+}
+
+position_cache = cache.PositionCache()
+
+
+def populate_chessboard(chessboard, placement=None):
     """
     Populates the dictionary with starting piece positions.
-    :param chessboard: Dict
+    Kings and rooks outside of their starting rank are marked as moved, so they can not castle.
+    :param chessboard: board.Chessboard
+    :param placement: Dict, defaults to board.default_starting_placement
     :return: None
     """
+    if placement is None:
+        placement = brd.default_starting_placement
+
     for row in range(8):
         for col in range(8):
             if (row + col) % 2 == 1:
@@ -23,12 +42,13 @@ def populate_chessboard(chessboard):
             else:
                 color = glb.WHITEFIELD
 
-            placed_piece = brd.default_starting_placement[(row, col)]
+            placed_piece = placement.get((row, col))
             if placed_piece is not None:
-                generated_piece = eval(brd.basic_pieces[placed_piece])
+                generated_piece = piece.create_piece(*brd.basic_pieces[placed_piece])
             else:
                 generated_piece = None
-            chessboard[(row, col)] = sq.Square(row, col, glb.SQUAREWIDTH, color, generated_piece)
+            chessboard[(row, col)] = sq.Square(row, col, glb.SQUAREWIDTH, color, None, chessboard.flags)
+            set_piece(chessboard, (row, col), generated_piece)
 
             if (
                 chessboard[(row, col)].piece is not None and
@@ -39,6 +59,70 @@ def populate_chessboard(chessboard):
                 if chessboard[(row, col)].piece.team == "b" and col != 0:
                     chessboard[(row, col)].piece.moved = True
 
+    chessboard.hash = zobrist.compute_hash(chessboard, "w")
+    chessboard.position_hashes = [chessboard.hash]
+    count_material(chessboard)
+
+
+def count_material(chessboard):
+    """
+    Counts the pieces of every type and the bishops on light and dark squares of both teams from scratch.
+    The moves keep the counts up to date afterwards, see add_material and remove_material.
+    :param chessboard: board.Chessboard
+    :return: None
+    """
+    for team in ["w", "b"]:
+        chessboard.material[team] = dict.fromkeys(PIECE_ORDER, 0)
+        chessboard.bishop_colors[team] = [0, 0]
+        for square in chessboard.pieces[team]:
+            add_material(chessboard, chessboard[square].piece, square)
+
+
+def add_material(chessboard, placed_piece, square):
+    """
+    Counts a piece placed on a square in the material of its team.
+    :param chessboard: board.Chessboard
+    :param placed_piece: piece.Piece
+    :param square: Tuple
+    :return: None
+    """
+    chessboard.material[placed_piece.team][placed_piece.type_] += 1
+    if placed_piece.type_ == "bishop":
+        chessboard.bishop_colors[placed_piece.team][(square[0] + square[1]) % 2] += 1
+
+
+def remove_material(chessboard, placed_piece, square):
+    """
+    Takes a piece leaving the board from a square out of the material of its team.
+    :param chessboard: board.Chessboard
+    :param placed_piece: piece.Piece
+    :param square: Tuple
+    :return: None
+    """
+    chessboard.material[placed_piece.team][placed_piece.type_] -= 1
+    if placed_piece.type_ == "bishop":
+        chessboard.bishop_colors[placed_piece.team][(square[0] + square[1]) % 2] -= 1
+
+
+def set_piece(chessboard, square, placed_piece):
+    """
+    Places a piece, or None, on a square and updates the piece lists, king squares and hash of the chessboard.
+    :param chessboard: board.Chessboard
+    :param square: Tuple
+    :param placed_piece: piece.Piece
+    :return: None
+    """
+    previous_piece = chessboard[square].piece
+    if previous_piece is not None:
+        chessboard.pieces[previous_piece.team].discard(square)
+        chessboard.hash ^= zobrist.PIECE_KEYS[previous_piece.team, previous_piece.type_, square]
+    chessboard[square].piece = placed_piece
+    if placed_piece is not None:
+        chessboard.pieces[placed_piece.team].add(square)
+        chessboard.hash ^= zobrist.PIECE_KEYS[placed_piece.team, placed_piece.type_, square]
+        if placed_piece.type_ == "king":
+            chessboard.kings[placed_piece.team] = square
+
 
 def switch_active_team(team):
     """
@@ -58,28 +142,7 @@ def clear_selection_highlight(chessboard):
     :param chessboard: Dict
     :return: None
     """
-    for square in chessboard:
-        chessboard[square].selected_piece = False
-        chessboard[square].regular_move = False
-        chessboard[square].eat_move = False
-        chessboard[square].special_move = False
-        chessboard[square].castle_move = False
-        chessboard[square].enpassant_move = False
-        chessboard[square].promotion_move = False
-        chessboard[square].double_move = False
-
-
-def clear_cached_move(chessboard):
-    """
-    Resets cached moves that were used for checking if a check has occured.
-    :param chessboard: Dict
-    :return: None
-    """
-    for square in chessboard:
-        if chessboard[square].check_in_progress:
-            chessboard[square].piece = chessboard[square].piece_cache
-            chessboard[square].piece_cache = None
-            chessboard[square].check_in_progress = False
+    chessboard.flags[:] = bytes(64)
 
 
 def is_any_piece_selected(chessboard):
@@ -88,10 +151,7 @@ def is_any_piece_selected(chessboard):
     :param chessboard: Dict
     :return: Bool
     """
-    for square in chessboard:
-        if chessboard[square].selected_piece:
-            return True
-    return False
+    return any(flags & sq.SELECTED_PIECE for flags in chessboard.flags)
 
 
 def is_same_team(chessboard, square1, square2):
@@ -114,380 +174,474 @@ def is_square_within_board(square):
     return 0 <= square[0] < 8 and 0 <= square[1] < 8
 
 
-def is_direction_finished(chessboard, source, destination):
+def build_ray(square, step):
     """
-    Checks if highlighting should be stopped in a direction for rook, bishop or queen piece.
-    :param chessboard: Dict
-    :param source: Tuple
-    :param destination: Tuple
-    :return: Bool
+    Lists the squares from a square outward in a direction until the board edge, the square itself excluded.
+    :param square: Tuple
+    :param step: Tuple
+    :return: Tuple
     """
-    if not is_square_within_board(destination):
-        return True
-    elif chessboard[destination].piece is not None:
-        if(
-                chessboard[destination].eat_move or
-                is_same_team(chessboard, source, destination)
-        ):
-            return True
-    else:
-        return False
+    ray = []
+    target = (square[0] + step[0], square[1] + step[1])
+    while is_square_within_board(target):
+        ray.append(target)
+        target = (target[0] + step[0], target[1] + step[1])
+    return tuple(ray)
 
 
-def generate_moves_king(moves, king):
+def build_targets(square, offsets):
     """
-    Generates all potential moves the king can perform from the current square.
-    :param moves: List
-    :param king: Tuple
-    :return: None
+    Lists the squares at the given offsets from a square that lie on the board.
+    :param square: Tuple
+    :param offsets: List
+    :return: Tuple
     """
-    offset = range(-1, 2)
-    moves.extend(
-        [
-            (king[0] + offset_col, king[1] + offset_row)
-            for offset_col in offset
-            for offset_row in offset
-            if offset_col != 0 or offset_row != 0
-        ]
-    )
+    targets = [(square[0] + offset[0], square[1] + offset[1]) for offset in offsets]
+    return tuple(target for target in targets if is_square_within_board(target))
 
 
-def generate_moves_rook(moves, rook):
+def build_pawn_pushes(square, team):
     """
-    Generates all potential moves the rook can perform from the current square.
-    :param moves: List
-    :param rook: Tuple
-    :return: None
+    Lists the on-board squares a pawn of a team pushes to from a square, two of them from its starting rank.
+    :param square: Tuple
+    :param team: String
+    :return: Tuple
     """
-    offset = range(1, 8)
-    moves.extend(
-        [
-            [(rook[0] + offset_val, rook[1]) for offset_val in offset],
-            [(rook[0] - offset_val, rook[1]) for offset_val in offset],
-            [(rook[0], rook[1] + offset_val) for offset_val in offset],
-            [(rook[0], rook[1] - offset_val) for offset_val in offset]
-        ]
-    )
+    direction = PAWN_DIRECTIONS[team]
+    if square[1] == PAWN_START_COLS[team]:
+        return build_targets(square, [(0, direction), (0, 2 * direction)])
+    return build_targets(square, [(0, direction)])
+
+
+SQUARES = [(row, col) for row in range(8) for col in range(8)]
+KING_OFFSETS = [(col, row) for col in range(-1, 2) for row in range(-1, 2) if col != 0 or row != 0]
+KNIGHT_OFFSETS = [(col, row) for col in [-1, 1, -2, 2] for row in [-1, 1, -2, 2] if col + row != 0 and col != row]
+ROOK_STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_STEPS = [(1, -1), (-1, -1), (-1, 1), (1, 1)]
+PAWN_DIRECTIONS = {"w": -1, "b": 1}
+PAWN_START_COLS = {"w": 6, "b": 1}
+
+# Square: on-board target squares, built once so move generation does not allocate or check the board edge.
+KING_TARGETS = {square: build_targets(square, KING_OFFSETS) for square in SQUARES}
+KNIGHT_TARGETS = {square: build_targets(square, KNIGHT_OFFSETS) for square in SQUARES}
+
+# Square: sliding rays that reach past the square, each ordered from the square outward.
+ROOK_RAYS = {
+    square: tuple(ray for ray in [build_ray(square, step) for step in ROOK_STEPS] if ray)
+    for square in SQUARES
+}
+BISHOP_RAYS = {
+    square: tuple(ray for ray in [build_ray(square, step) for step in BISHOP_STEPS] if ray)
+    for square in SQUARES
+}
+QUEEN_RAYS = {square: BISHOP_RAYS[square] + ROOK_RAYS[square] for square in SQUARES}
+SLIDING_RAYS = {"rook": ROOK_RAYS, "bishop": BISHOP_RAYS, "queen": QUEEN_RAYS}
+
+# Team: square: on-board squares a pawn of the team on the square captures, and its single and double push squares.
+PAWN_CAPTURES = {
+    team: {square: build_targets(square, [(-1, direction), (1, direction)]) for square in SQUARES}
+    for team, direction in PAWN_DIRECTIONS.items()
+}
+PAWN_PUSHES = {
+    team: {square: build_pawn_pushes(square, team) for square in SQUARES} for team in PAWN_DIRECTIONS
+}
+
+# Team: square tables of the king, knight and pawn threats to the king of the team, with the piece type of the threat.
+STEP_THREATS = {
+    team: ((KING_TARGETS, "king"), (KNIGHT_TARGETS, "knight"), (PAWN_CAPTURES[team], "pawn"))
+    for team in PAWN_DIRECTIONS
+}
+# Ray tables of the sliding threats to a king, with the piece types that attack along them.
+SLIDING_THREATS = (
+    (ROOK_RAYS, frozenset(["rook", "queen"])), (BISHOP_RAYS, frozenset(["bishop", "queen"]))
+)
+
+
+def get_attacked_squares(chessboard, team):
+    """
+    Builds the set of squares attacked by the enemies of a team.
+    Sliding attacks continue through the king of the team, so the king can not step back along the line of a check.
+    :param chessboard: Dict
+    :param team: String
+    :return: Set
+    """
+    attacked = set()
+    for square in chessboard.pieces[switch_active_team(team)]:
+        attacker = chessboard[square].piece
+
+        if attacker.type_ == "pawn":
+            attacked.update(PAWN_CAPTURES[attacker.team][square])
+        elif attacker.type_ == "knight":
+            attacked.update(KNIGHT_TARGETS[square])
+        elif attacker.type_ == "king":
+            attacked.update(KING_TARGETS[square])
+        else:
+            for ray in SLIDING_RAYS[attacker.type_][square]:
+                for target in ray:
+                    attacked.add(target)
+                    occupant = chessboard[target].piece
+                    if occupant is not None and not (occupant.type_ == "king" and occupant.team == team):
+                        break
+    return attacked
 
 
-def generate_moves_bishop(moves, bishop):
-    """
-    Generates all potential moves the bishop can perform from the current square.
-    :param moves: List
-    :param bishop: Tuple
-    :return: None
+def get_legality(chessboard, team):
     """
-    offset = range(1, 8)
-    moves.extend(
-        [
-            [(bishop[0] + offset_val, bishop[1] - offset_val) for offset_val in offset],
-            [(bishop[0] - offset_val, bishop[1] - offset_val) for offset_val in offset],
-            [(bishop[0] - offset_val, bishop[1] + offset_val) for offset_val in offset],
-            [(bishop[0] + offset_val, bishop[1] + offset_val) for offset_val in offset]
-        ]
-    )
+    Computes the king square, the checking pieces, the pinned pieces and the enemy attack map of a team.
+    Pinned pieces map to the squares they can still move to. During a single check the block squares are the squares
+    that capture the checking piece or stand between it and the king.
+    :param chessboard: Dict
+    :param team: String
+    :return: Dict
+    """
+    king = chessboard.kings[team]
+    checkers = []
+    block = set()
+    pins = {}
+
+    for rays, sliders in SLIDING_THREATS:
+        for ray in rays[king]:
+            own_piece = None
+            for index, square in enumerate(ray):
+                occupant = chessboard[square].piece
+                if occupant is None:
+                    continue
+                if occupant.team == team:
+                    if own_piece is not None:
+                        break
+                    own_piece = square
+                else:
+                    if occupant.type_ in sliders:
+                        if own_piece is None:
+                            checkers.append(square)
+                            block.update(ray[:index + 1])
+                        else:
+                            pins[own_piece] = set(ray[:index + 1])
+                    break
+
+    for squares, threat in STEP_THREATS[team][1:]:
+        for square in squares[king]:
+            if (
+                    chessboard[square].piece is not None and
+                    chessboard[square].piece.team != team and
+                    chessboard[square].piece.type_ == threat
+            ):
+                checkers.append(square)
+                block.add(square)
 
+    return {
+        "king": king,
+        "checkers": checkers,
+        "block": block,
+        "pins": pins,
+        "attacked": get_attacked_squares(chessboard, team)
+    }
 
-def generate_moves_queen(moves, queen):
-    """
-    Generates all potential moves the queen can perform from the current square.
-    :param moves: List
-    :param queen: Tuple
-    :return: None
-    """
-    generate_moves_bishop(moves, queen)
-    generate_moves_rook(moves, queen)
 
-
-def generate_moves_knight(moves, knight):
+def is_move_legal(chessboard, move, team, legality):
     """
-    Generates all potential moves the knight can perform from the current square.
-    :param moves: List
-    :param knight: Tuple
-    :return: None
+    Tests if a move leaves the king of the team safe, using the precomputed legality information.
+    Only en passant moves, which can uncover a check along the rank, are tested by executing the move.
+    :param chessboard: Dict
+    :param move: move.Move
+    :param team: String
+    :param legality: Dict
+    :return: Bool
     """
-    offset = [-1, 1, -2, 2]
-    moves.extend(
-        [
-            (knight[0] + offset_col, knight[1] + offset_row)
-            for offset_col in offset
-            for offset_row in offset
-            if offset_col + offset_row != 0 and offset_col != offset_row
-        ]
-    )
+    if move.kind == "enpassant_move":
+        return not is_check_caused(chessboard, move, team)
+    if move.kind == "castle_move":
+        return is_castling_safe(chessboard, move, legality)
+    if move.source == legality["king"]:
+        return move.destination not in legality["attacked"]
+    if len(legality["checkers"]) > 1:
+        return False
+    if move.source in legality["pins"] and move.destination not in legality["pins"][move.source]:
+        return False
+    if legality["checkers"] and move.destination not in legality["block"]:
+        return False
+    return True
 
 
-def generate_moves_pawn(chessboard, pawn, enpassant=None, eat=None, double=None, single=None):
+def collect_move(chessboard, moves, source, destination, team, legality):
     """
-    Generates all potential moves the pawn can perform from the current square.
+    Collects a single regular or eat move if it does not leave the king under check.
     :param chessboard: Dict
-    :param pawn: Tuple
-    :param enpassant: List
-    :param eat: List
-    :param double: Bool
-    :param single: Bool
-    :return: Tuple
+    :param moves: List
+    :param source: Tuple
+    :param destination: Tuple
+    :param team: String
+    :param legality: Dict
+    :return: None
     """
-    if chessboard[pawn].piece.team == "w":
-        direction = -1
+    if chessboard[destination].piece is not None:
+        if (
+                chessboard[destination].piece.team == team or
+                chessboard[destination].piece.type_ == "king"
+        ):
+            return
+        move = mv.Move(source, destination, "eat_move")
     else:
-        direction = 1
-
-    if single is not None:
-        return pawn[0], pawn[1] + direction
+        move = mv.Move(source, destination, "regular_move")
+    if is_move_legal(chessboard, move, team, legality):
+        moves.append(move)
 
-    if double is not None:
-        return pawn[0], pawn[1] + (2 * direction)
 
-    if eat is not None:
-        eat.extend(
-            [
-                (pawn[0] - 1, pawn[1] + direction),
-                (pawn[0] + 1, pawn[1] + direction)
-            ]
-        )
-
-    if enpassant is not None:
-        eat_moves = [
-            (pawn[0] - 1, pawn[1] + direction),
-            (pawn[0] + 1, pawn[1] + direction)
-        ]
-        enpassant.extend(
-            [
-                (eat_moves[0], (eat_moves[0][0], eat_moves[0][1] - direction)),
-                (eat_moves[1], (eat_moves[1][0], eat_moves[1][1] - direction))
-            ]
-        )
-
-
-def highlight_move(chessboard, source, destination, team):
+def is_castling_safe(chessboard, move, legality):
     """
-    Highlights a single regular or eat move.
+    Tests that the king is not under check and does not pass through or land on an attacked square while castling.
     :param chessboard: Dict
-    :param source: Tuple
-    :param destination: Tuple
-    :param team: String
-    :return: None
+    :param move: move.Move
+    :param legality: Dict
+    :return: Bool
     """
-    if is_square_within_board(destination):
-        if chessboard[destination].piece is not None:
-            if (
-                    chessboard[destination].piece.team != team and
-                    chessboard[destination].piece.type_ != "king"
-            ):
-                if not is_check_caused(chessboard, source, destination, team):
-                    chessboard[destination].eat_move = True
-        else:
-            if not is_check_caused(chessboard, source, destination, team):
-                chessboard[destination].regular_move = True
+    if legality["checkers"]:
+        return False
+    king = legality["king"]
+    if move.destination[0] == 0:
+        fields = [(3, king[1]), (2, king[1])]
+    else:
+        fields = [(5, king[1]), (6, king[1])]
+    return not any(field in legality["attacked"] for field in fields)
 
 
-def highlight_castling(chessboard, source, team):
+def collect_castling(chessboard, moves, king, team, legality):
     """
-    Highlights pieces that are eligible for castling.
+    Collects castling moves of a king that is eligible for castling. The castling moves of a rook are the same moves
+    seen from the rook, highlight_potential_moves derives them when a rook is selected.
     :param chessboard: Dict
-    :param source: Tuple
+    :param moves: List
+    :param king: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    if (
-            chessboard[source].piece.type_ == "king" and
-            not chessboard[source].piece.moved
-    ):
-        rooks = [(0, source[1]), (7, source[1])]
-        for rook in rooks:
-            if (
-                    chessboard[rook].piece is not None and
-                    chessboard[rook].piece.type_ == "rook" and
-                    is_same_team(chessboard, source, rook) and
-                    not chessboard[rook].piece.moved
-            ):
-                if rook[0] == 0:
-                    fields_in_between = [(row, source[1]) for row in range(1, 4)]
-                if rook[0] == 7:
-                    fields_in_between = [(row, source[1]) for row in range(5, 7)]
-                all_fields_free = True
-
-                for field in fields_in_between:
-                    if chessboard[field].piece is not None:
-                        all_fields_free = False
-
-                if (
-                        all_fields_free and
-                        not is_check_caused(chessboard, source, rook, team)
-                ):
-                    chessboard[rook].special_move = True
-                    chessboard[rook].castle_move = True
-
-    if (
-            chessboard[source].piece.type_ == "rook" and
-            not chessboard[source].piece.moved
-    ):
-        king = (4, source[1])
+    if chessboard[king].piece.moved:
+        return
+    for rook in [(0, king[1]), (7, king[1])]:
         if (
-                chessboard[king].piece is not None and
-                chessboard[king].piece.type_ == "king" and
-                is_same_team(chessboard, source, king) and
-                not chessboard[king].piece.moved
+                chessboard[rook].piece is not None and
+                chessboard[rook].piece.type_ == "rook" and
+                is_same_team(chessboard, king, rook) and
+                not chessboard[rook].piece.moved
         ):
-            if source[0] == 0:
-                fields_in_between = [(row, source[1]) for row in range(1, 4)]
-            if source[0] == 7:
-                fields_in_between = [(row, source[1]) for row in range(5, 7)]
+            if rook[0] == 0:
+                fields_in_between = [(row, king[1]) for row in range(1, 4)]
+            if rook[0] == 7:
+                fields_in_between = [(row, king[1]) for row in range(5, 7)]
             all_fields_free = True
 
             for field in fields_in_between:
                 if chessboard[field].piece is not None:
                     all_fields_free = False
 
+            move = mv.Move(king, rook, "castle_move")
             if (
                     all_fields_free and
-                    not is_check_caused(chessboard, source, king, team)
+                    is_move_legal(chessboard, move, team, legality)
             ):
-                chessboard[king].special_move = True
-                chessboard[king].castle_move = True
+                moves.append(move)
 
 
-def highlight_moves_king(chessboard, king, team):
+def collect_moves_king(chessboard, moves, king, team, legality):
     """
-    Highlight moves of the king piece.
+    Collects legal moves of the king piece.
     :param chessboard: Dict
+    :param moves: List
     :param king: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    moves = []
-    generate_moves_king(moves, king)
-    for move in moves:
-        highlight_move(chessboard, king, move, team)
-    highlight_castling(chessboard, king, team)
+    for destination in KING_TARGETS[king]:
+        collect_move(chessboard, moves, king, destination, team, legality)
+    collect_castling(chessboard, moves, king, team, legality)
 
 
-def highlight_moves_rook(chessboard, rook, team):
+def collect_moves_rook(chessboard, moves, rook, team, legality):
     """
-    Highlight moves of the rook piece.
+    Collects legal moves of the rook piece.
     :param chessboard: Dict
+    :param moves: List
     :param rook: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    move_directions = []
-    generate_moves_rook(move_directions, rook)
-    for direction in move_directions:
-        for move in direction:
-            highlight_move(chessboard, rook, move, team)
-            if is_direction_finished(chessboard, rook, move):
-                break
-    highlight_castling(chessboard, rook, team)
+    collect_moves_directions(chessboard, moves, rook, team, legality, ROOK_RAYS[rook])
 
 
-def highlight_moves_bishop(chessboard, bishop, team):
+def collect_moves_bishop(chessboard, moves, bishop, team, legality):
     """
-    Highlight moves of the bishop piece.
+    Collects legal moves of the bishop piece.
     :param chessboard: Dict
+    :param moves: List
     :param bishop: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    move_directions = []
-    generate_moves_bishop(move_directions, bishop)
-    for direction in move_directions:
-        for move in direction:
-            highlight_move(chessboard, bishop, move, team)
-            if is_direction_finished(chessboard, bishop, move):
-                break
+    collect_moves_directions(chessboard, moves, bishop, team, legality, BISHOP_RAYS[bishop])
 
 
-def highlight_moves_queen(chessboard, queen, team):
+def collect_moves_queen(chessboard, moves, queen, team, legality):
     """
-    Highlight moves of the queen piece.
+    Collects legal moves of the queen piece.
     :param chessboard: Dict
+    :param moves: List
     :param queen: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    highlight_moves_rook(chessboard, queen, team)
-    highlight_moves_bishop(chessboard, queen, team)
+    collect_moves_directions(chessboard, moves, queen, team, legality, QUEEN_RAYS[queen])
 
 
-def highlight_moves_knight(chessboard, knight, team):
+def collect_moves_directions(chessboard, moves, source, team, legality, rays):
     """
-    Highlight moves of the knight piece.
+    Collects legal moves of a sliding piece along every ray until a piece blocks it.
     :param chessboard: Dict
+    :param moves: List
+    :param source: Tuple
+    :param team: String
+    :param legality: Dict
+    :param rays: Tuple of rays from the source square
+    :return: None
+    """
+    for ray in rays:
+        for destination in ray:
+            collect_move(chessboard, moves, source, destination, team, legality)
+            if chessboard[destination].piece is not None:
+                break
+
+
+def collect_moves_knight(chessboard, moves, knight, team, legality):
+    """
+    Collects legal moves of the knight piece.
+    :param chessboard: Dict
+    :param moves: List
     :param knight: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    moves = []
-    generate_moves_knight(moves, knight)
-    for move in moves:
-        highlight_move(chessboard, knight, move, team)
+    for destination in KNIGHT_TARGETS[knight]:
+        collect_move(chessboard, moves, knight, destination, team, legality)
 
 
-def highlight_moves_pawn(chessboard, pawn, team):
+def collect_moves_pawn(chessboard, moves, pawn, team, legality):
     """
-    Highlight moves of the pawn piece.
+    Collects legal moves of the pawn piece. Every promotion yields one move per piece choice.
     :param chessboard: Dict
+    :param moves: List
     :param pawn: Tuple
     :param team: String
+    :param legality: Dict
     :return: None
     """
-    single_move = generate_moves_pawn(chessboard, pawn, single=True)
-    if (
-            is_square_within_board(single_move) and
-            chessboard[single_move].piece is None
-    ):
-        if single_move[1] in [0, 7]:
-            if not is_check_caused(chessboard, pawn, single_move, team):
-                chessboard[single_move].special_move = True
-                chessboard[single_move].promotion_move = True
+    candidates = []
+    for push in PAWN_PUSHES[team][pawn]:
+        if chessboard[push].piece is not None:
+            break
+        if push[1] in [0, 7]:
+            candidates.append(mv.Move(pawn, push, "promotion_move"))
+        elif push[1] == pawn[1] + PAWN_DIRECTIONS[team]:
+            candidates.append(mv.Move(pawn, push, "regular_move"))
         else:
-            if not is_check_caused(chessboard, pawn, single_move, team):
-                chessboard[single_move].regular_move = True
-
-    double_move = generate_moves_pawn(chessboard, pawn, double=True)
-    if (
-            is_square_within_board(double_move) and
-            chessboard[single_move].piece is None and
-            chessboard[double_move].piece is None and
-            pawn[1] in [1, 6]
-    ):
-        if not is_check_caused(chessboard, pawn, double_move, team):
-            chessboard[double_move].special_move = True
-            chessboard[double_move].double_move = True
-
-    eat_moves = []
-    generate_moves_pawn(chessboard, pawn, eat=eat_moves)
-    for move in eat_moves:
-        if (
-                is_square_within_board(move) and
-                chessboard[move].piece is not None and
-                not is_same_team(chessboard, pawn, move) and
-                chessboard[move].piece.type_ != "king"
-        ):
-            if not is_check_caused(chessboard, pawn, move, team):
-                chessboard[move].eat_move = True
+            candidates.append(mv.Move(pawn, push, "double_move"))
 
-    enpassant_field_pairs = []
-    generate_moves_pawn(chessboard, pawn, enpassant=enpassant_field_pairs)
-    for enpassant in enpassant_field_pairs:
-        if (
-                is_square_within_board(enpassant[0]) and
-                chessboard[enpassant[0]].piece is None and
-                is_square_within_board(enpassant[1]) and
-                chessboard[enpassant[1]].piece is not None and
-                chessboard[enpassant[1]].piece.type_ == "pawn" and
-                not is_same_team(chessboard, pawn, enpassant[1]) and
-                chessboard[enpassant[1]].piece.double_move
-        ):
-            if not is_check_caused(chessboard, pawn, enpassant[0], team):
-                chessboard[enpassant[0]].special_move = True
-                chessboard[enpassant[0]].enpassant_move = True
+    for move in PAWN_CAPTURES[team][pawn]:
+        if chessboard[move].piece is not None:
+            if (
+                    chessboard[move].piece.team != team and
+                    chessboard[move].piece.type_ != "king"
+            ):
+                if move[1] in [0, 7]:
+                    candidates.append(mv.Move(pawn, move, "promotion_move"))
+                else:
+                    candidates.append(mv.Move(pawn, move, "eat_move"))
+        else:
+            enpassant = (move[0], pawn[1])
+            if (
+                    chessboard[enpassant].piece is not None and
+                    chessboard[enpassant].piece.type_ == "pawn" and
+                    chessboard[enpassant].piece.team != team and
+                    chessboard[enpassant].piece.double_move
+            ):
+                candidates.append(mv.Move(pawn, move, "enpassant_move"))
+
+    for move in candidates:
+        if is_move_legal(chessboard, move, team, legality):
+            if move.kind == "promotion_move":
+                moves.extend([move._replace(promotion=type_) for type_ in PROMOTION_CHOICES])
+            else:
+                moves.append(move)
+
+
+COLLECT_FUNCTIONS = {
+    "king": collect_moves_king, "queen": collect_moves_queen, "rook": collect_moves_rook,
+    "bishop": collect_moves_bishop, "knight": collect_moves_knight, "pawn": collect_moves_pawn
+}
+
+
+def generate_legal_moves(chessboard, team, legality=None):
+    """
+    Returns all legal moves of a team in a single pass over the board. Castling is listed once, from the king.
+    :param chessboard: Dict
+    :param team: String
+    :param legality: Dict, computed when not given
+    :return: List
+    """
+    moves = []
+    if legality is None:
+        legality = get_legality(chessboard, team)
+    for square in list(chessboard.pieces[team]):
+        if chessboard[square].piece is not None:
+            COLLECT_FUNCTIONS[chessboard[square].piece.type_](chessboard, moves, square, team, legality)
+    return moves
+
+
+def get_position_key(chessboard, team):
+    """
+    Returns the key of the position and the queried team in the position cache.
+    :param chessboard: Dict
+    :param team: String
+    :return: Integer
+    """
+    return chessboard.hash ^ zobrist.QUERY_KEYS[team]
+
+
+def get_legal_moves(chessboard, team):
+    """
+    Returns the legal moves of a team and whether its king is under check.
+    Positions seen before are answered from the position cache instead of generating the moves again.
+    :param chessboard: Dict
+    :param team: String
+    :return: Tuple
+    """
+    key = get_position_key(chessboard, team)
+    entry = position_cache.get(key)
+    if entry is None:
+        legality = get_legality(chessboard, team)
+        entry = (generate_legal_moves(chessboard, team, legality), bool(legality["checkers"]))
+        position_cache.put(key, *entry)
+    return entry
+
+
+def highlight_move(chessboard, move):
+    """
+    Sets the move flags of a single move on its destination square, moves other than regular and eat moves are also
+    flagged as special.
+    :param chessboard: Dict
+    :param move: move.Move
+    :return: None
+    """
+    chessboard.flags[chessboard[move.destination].index] |= MOVE_FLAGS[move.kind]
 
 
 def highlight_potential_moves(chessboard, source, team):
     """
-    Chooses what piece needs its move highlighted and executes the highlighting.
+    Highlights the legal moves of the piece on the selected square, a selected rook also shows its castling moves.
     :param chessboard: Dict
     :param source: Tuple
     :param team: String
@@ -496,76 +650,75 @@ def highlight_potential_moves(chessboard, source, team):
     if chessboard[source].piece is not None:
         if chessboard[source].piece.team == team:
             chessboard[source].selected_piece = True
-            exec("highlight_moves_" + chessboard[source].piece.type_ + "(chessboard, clicked_square, team)")
+            for move in get_legal_moves(chessboard, team)[0]:
+                if move.source == source:
+                    highlight_move(chessboard, move)
+                elif move.kind == "castle_move" and move.destination == source:
+                    highlight_move(chessboard, mv.Move(source, move.source, "castle_move"))
 
 
-def do_regular_move(chessboard, source, destination, check=False):
+def do_regular_move(chessboard, source, destination):
     """
-    Executes a regular move.
+    Executes a regular move. The halfmove clock restarts after a pawn move and counts every other move.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
-    if check:
-        chessboard[source].piece_cache = chessboard[source].piece
-        chessboard[source].check_in_progress = True
-        chessboard[destination].check_in_progress = True
-
-    chessboard[destination].piece = chessboard[source].piece
-    chessboard[source].piece = None
+    if chessboard[source].piece.type_ == "pawn":
+        chessboard.halfmove_clock = 0
+    else:
+        chessboard.halfmove_clock += 1
+    set_piece(chessboard, destination, chessboard[source].piece)
+    set_piece(chessboard, source, None)
 
-    if not check:
-        for square in chessboard:
-            if chessboard[square].former_move:
-                chessboard[square].former_move = False
+    for square in chessboard.former_moves:
+        chessboard[square].former_move = False
 
-        chessboard[source].former_move = True
-        chessboard[destination].former_move = True
+    chessboard[source].former_move = True
+    chessboard[destination].former_move = True
+    chessboard.former_moves = [source, destination]
 
-        if chessboard[destination].piece.type_ in ["rook", "king"]:
-            chessboard[destination].piece.moved = True
+    if chessboard[destination].piece.type_ in ["rook", "king"]:
+        chessboard[destination].piece.moved = True
 
 
-def do_eat_move(chessboard, source, destination, check=False):
+def do_eat_move(chessboard, source, destination):
     """
-    Executes an eat move.
+    Executes an eat move, which restarts the halfmove clock and takes the eaten piece out of the material.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
-    if check:
-        chessboard[destination].piece_cache = chessboard[destination].piece
-    chessboard[destination].piece = None
-    do_regular_move(chessboard, source, destination, check)
+    remove_material(chessboard, chessboard[destination].piece, destination)
+    set_piece(chessboard, destination, None)
+    do_regular_move(chessboard, source, destination)
+    chessboard.halfmove_clock = 0
 
 
-def do_double_move(chessboard, source, destination, check=False):
+def do_double_move(chessboard, source, destination):
     """
-    Executes a double move.
+    Executes a double move and remembers the pawn that can be taken en passant.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
-    do_regular_move(chessboard, source, destination, check)
-    if not check:
-        chessboard[destination].piece.double_move = True
+    do_regular_move(chessboard, source, destination)
+    chessboard[destination].piece.double_move = True
+    chessboard.enpassant = destination
 
 
-def do_castle_move(chessboard, source, destination, check=False):
+def do_castle_move(chessboard, source, destination):
     """
-    Executes a castle move.
+    Executes a castle move, which counts as a single move on the halfmove clock.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
+    halfmove_clock = chessboard.halfmove_clock
     if chessboard[source].piece.type_ == "king":
         king = source
         rook = destination
@@ -573,105 +726,242 @@ def do_castle_move(chessboard, source, destination, check=False):
         rook = source
         king = destination
 
-    if check:
-        chessboard[king].piece.moved = True
-        chessboard[rook].piece.moved = True
-
     if rook[0] == 0:
-        do_regular_move(chessboard, king, (2, king[1]), check)
-        do_regular_move(chessboard, rook, (3, rook[1]), check)
+        do_regular_move(chessboard, king, (2, king[1]))
+        do_regular_move(chessboard, rook, (3, rook[1]))
     if rook[0] == 7:
-        do_regular_move(chessboard, king, (6, king[1]), check)
-        do_regular_move(chessboard, rook, (5, rook[1]), check)
+        do_regular_move(chessboard, king, (6, king[1]))
+        do_regular_move(chessboard, rook, (5, rook[1]))
+    chessboard.halfmove_clock = halfmove_clock + 1
 
 
-def do_enpassant_move(chessboard, source, destination, check=False):
+def do_enpassant_move(chessboard, source, destination):
     """
-    Executes an enpassant move.
+    Executes an enpassant move and takes the eaten pawn out of the material.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
-    do_regular_move(chessboard, source, destination, check)
-    offset = [1, -1]
-    for offset_val in offset:
-        enpassant = (destination[0], destination[1] + offset_val)
-        if (
-                chessboard[enpassant].piece is not None and
-                chessboard[enpassant].piece.type_ == "pawn" and
-                chessboard[enpassant].piece.double_move
-        ):
-            if check:
-                chessboard[enpassant].piece_cache = chessboard[enpassant].piece
-                chessboard[enpassant].check_in_progress = True
-            chessboard[enpassant].piece = None
+    eaten = (destination[0], source[1])
+    do_regular_move(chessboard, source, destination)
+    remove_material(chessboard, chessboard[eaten].piece, eaten)
+    set_piece(chessboard, eaten, None)
 
 
-def do_promotion_move(chessboard, source, destination, check=False):
+def do_promotion_move(chessboard, source, destination):
     """
-    Executes the first half of the promotion move. Executes pawn movement and gui generation.
+    Executes the first half of the promotion move. Executes pawn movement, the piece choice is left to the caller.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
     :return: None
     """
-    do_regular_move(chessboard, source, destination, check)
-    if not check:
-        gui.set_promotion_display(chessboard, destination)
+    if chessboard[destination].piece is not None:
+        do_eat_move(chessboard, source, destination)
+    else:
+        do_regular_move(chessboard, source, destination)
+
 
+MOVE_FUNCTIONS = {
+    "regular_move": do_regular_move, "eat_move": do_eat_move, "double_move": do_double_move,
+    "castle_move": do_castle_move, "enpassant_move": do_enpassant_move, "promotion_move": do_promotion_move
+}
 
-def do_promotion_resolve(chessboard, clicked_square):
+
+def do_promotion_resolve(chessboard, promotion_field, type_):
     """
-    Executes the second half of the promotion move. Executes piece swap after choice and gui reset.
+    Executes the second half of the promotion move. Swaps the promoted pawn for the chosen piece type in the material
+    and on the board and records the hash of the resulting position in place of the one with the pawn.
     :param chessboard: Dict
-    :param clicked_square: Tuple
+    :param promotion_field: Tuple
+    :param type_: String
     :return: None
     """
-    if clicked_square[1] <= 4:
-        promotion_field = (clicked_square[0], 0)
-    else:
-        promotion_field = (clicked_square[0], 7)
-
-    chessboard[promotion_field].piece_cache = chessboard[clicked_square].piece
-    gui.reset_promotion_display(chessboard, promotion_field)
+    team = chessboard[promotion_field].piece.team
+    promoted_piece = piece.create_piece(team, type_)
+    remove_material(chessboard, chessboard[promotion_field].piece, promotion_field)
+    add_material(chessboard, promoted_piece, promotion_field)
+    set_piece(chessboard, promotion_field, promoted_piece)
+    if chessboard.position_hashes:
+        chessboard.position_hashes[-1] = chessboard.hash
 
     if chessboard[promotion_field].piece.type_ == "rook":
         chessboard[promotion_field].piece.moved = True
 
 
-def do_move(chessboard, source, destination, check=False):
+def get_move_kind(chessboard, destination):
+    """
+    Reads which highlighted move is available on the destination square.
+    :param chessboard: Dict
+    :param destination: Tuple
+    :return: String or None
+    """
+    flags = chessboard.flags[chessboard[destination].index]
+    for kind in MOVE_KINDS:
+        if flags & MOVE_FLAGS[kind] == MOVE_FLAGS[kind]:
+            return kind
+    return None
+
+
+def do_move(chessboard, source, destination, kind=None):
     """
     Executes the available move on the selected square.
     :param chessboard: Dict
     :param source: Tuple
     :param destination: Tuple
-    :param check: Bool
+    :param kind: String, read from the highlighted destination square when not given
     :return: None
     """
-    moves = ["regular_move", "eat_move"]
-    if chessboard[source].piece.type_ == "pawn":
-        moves.extend(["double_move", "promotion_move", "enpassant_move"])
-    if chessboard[source].piece.type_ in ["king", "rook"]:
-        moves.extend(["castle_move"])
-
-    for move in moves:
-        if eval("chessboard[clicked_square]." + move):
-            if check:
-                exec("do_" + move + "(chessboard, selected_piece, clicked_square, check)")
-            else:
-                exec("do_" + move + "(chessboard, selected_piece, clicked_square)")
+    if kind is None:
+        kind = get_move_kind(chessboard, destination)
+    apply_move(chessboard, mv.Move(source, destination, kind))
 
-    if not check:
-        for square in chessboard:
-            if (
-                    chessboard[square].piece is not None and
-                    chessboard[square].piece.team != chessboard[source].piece.team and
-                    chessboard[square].piece.type_ == "pawn"
-            ):
-                chessboard[square].piece.double_move = False
+
+def get_enpassant_key(chessboard, pawn):
+    """
+    Returns the zobrist key of the file of a pawn that made a double move when a pawn of the other team can legally
+    take it en passant, 0 otherwise. The capturing pawns stand on the squares a pawn of the moved team would capture
+    from the square it passed. Every capture is tried by moving the pieces on the squares without touching the piece
+    lists or the hash.
+    :param chessboard: Dict
+    :param pawn: Tuple
+    :return: Integer
+    """
+    moved_pawn = chessboard[pawn].piece
+    team = switch_active_team(moved_pawn.team)
+    target = (pawn[0], pawn[1] - PAWN_DIRECTIONS[moved_pawn.team])
+    for square in PAWN_CAPTURES[moved_pawn.team][target]:
+        capturer = chessboard[square].piece
+        if capturer is None or capturer.type_ != "pawn" or capturer.team != team:
+            continue
+        chessboard[square].piece = None
+        chessboard[pawn].piece = None
+        chessboard[target].piece = capturer
+        in_check = is_king_under_check(chessboard, team)
+        chessboard[target].piece = None
+        chessboard[pawn].piece = moved_pawn
+        chessboard[square].piece = capturer
+        if not in_check:
+            return zobrist.ENPASSANT_KEYS[pawn[0]]
+    return 0
+
+
+def apply_move(chessboard, move):
+    """
+    Executes a move through the move function of its kind and updates the en passant pawn, the fullmove number and the
+    hash, whose new value is recorded in the position hashes. The move functions keep the halfmove clock.
+    The pawn that could be taken en passant before the move loses that right, the file of a pawn that makes a double
+    move is only hashed when it can be taken.
+    The promotion choice is left to the caller.
+    :param chessboard: Dict
+    :param move: move.Move
+    :return: None
+    """
+    castling_before = zobrist.castling_rights(chessboard)
+    if chessboard[move.source].piece.team == "b":
+        chessboard.fullmove_number += 1
+    if chessboard.enpassant is not None:
+        chessboard.hash ^= chessboard.enpassant_key
+        chessboard[chessboard.enpassant].piece.double_move = False
+        chessboard.enpassant = None
+        chessboard.enpassant_key = 0
+
+    MOVE_FUNCTIONS[move.kind](chessboard, move.source, move.destination)
+
+    if move.kind == "double_move":
+        chessboard.enpassant_key = get_enpassant_key(chessboard, move.destination)
+        chessboard.hash ^= chessboard.enpassant_key
+    chessboard.hash ^= (
+        zobrist.SIDE_KEY ^
+        zobrist.CASTLING_KEYS[castling_before] ^
+        zobrist.CASTLING_KEYS[zobrist.castling_rights(chessboard)]
+    )
+    chessboard.position_hashes.append(chessboard.hash)
+
+
+def record_move(chessboard, move):
+    """
+    Pushes what a move is about to change on the history of the chessboard, so unmake_move can take it back.
+    The pieces of the touched squares, the moved and double_move flags, the en passant pawn, the hash, the move
+    counters and the former move highlights are recorded.
+    :param chessboard: Dict
+    :param move: move.Move
+    :return: None
+    """
+    moved_piece = chessboard[move.source].piece
+    touched = [move.source, move.destination]
+    if move.kind == "castle_move":
+        touched.extend([(row, move.source[1]) for row in [2, 3, 5, 6]])
+    if move.kind == "enpassant_move":
+        touched.append((move.destination[0], move.source[1]))
+    pieces = [(square, chessboard[square].piece) for square in touched]
+
+    flags = []
+    for square, piece_ in pieces:
+        if piece_ is not None and piece_.type_ in ["king", "rook"]:
+            flags.append((piece_, "moved", piece_.moved))
+    if moved_piece.type_ == "pawn":
+        flags.append((moved_piece, "double_move", moved_piece.double_move))
+    if chessboard.enpassant is not None:
+        flags.append((chessboard[chessboard.enpassant].piece, "double_move", True))
+
+    chessboard.history.append(
+        (
+            move, pieces, flags, (chessboard.enpassant, chessboard.enpassant_key), chessboard.hash,
+            (chessboard.halfmove_clock, chessboard.fullmove_number), chessboard.former_moves
+        )
+    )
+
+
+def make_move(chessboard, move):
+    """
+    Executes a move after recording it with record_move. A promotion without a chosen piece is left for
+    do_promotion_resolve.
+    :param chessboard: Dict
+    :param move: move.Move
+    :return: None
+    """
+    record_move(chessboard, move)
+    apply_move(chessboard, move)
+    if move.kind == "promotion_move" and move.promotion is not None:
+        do_promotion_resolve(chessboard, move.destination, move.promotion)
+
+
+def unmake_move(chessboard):
+    """
+    Takes back the last move executed by make_move and returns it, a promotion with the piece it was resolved to.
+    The eaten piece and the promoted pawn are counted in the material again.
+    :param chessboard: Dict
+    :return: move.Move
+    """
+    move, pieces, flags, enpassant, hash_, counters, former_moves = chessboard.history.pop()
+    if move.kind == "promotion_move" and move.promotion is None:
+        move = mv.Move(move.source, move.destination, move.kind, chessboard[move.destination].piece.type_)
+
+    if move.kind == "promotion_move" and chessboard[move.destination].piece.type_ != "pawn":
+        remove_material(chessboard, chessboard[move.destination].piece, move.destination)
+        add_material(chessboard, pieces[0][1], move.destination)
+    if move.kind != "castle_move":
+        square, eaten = pieces[-1]
+        if eaten is not None:
+            add_material(chessboard, eaten, square)
+
+    for square, piece_ in pieces:
+        set_piece(chessboard, square, piece_)
+    for piece_, flag, value in flags:
+        setattr(piece_, flag, value)
+    chessboard.enpassant, chessboard.enpassant_key = enpassant
+    chessboard.hash = hash_
+    chessboard.halfmove_clock, chessboard.fullmove_number = counters
+    chessboard.position_hashes.pop()
+
+    for square in chessboard.former_moves:
+        chessboard[square].former_move = False
+    for square in former_moves:
+        chessboard[square].former_move = True
+    chessboard.former_moves = former_moves
+    return move
 
 
 def is_king_under_check(chessboard, team):
@@ -681,107 +971,126 @@ def is_king_under_check(chessboard, team):
     :param team: String
     :return: Bool
     """
-    check = False
-    for square in chessboard:
-        if (
-                chessboard[square].piece is not None and
-                chessboard[square].piece.type_ == "king"
-        ):
-            if chessboard[square].piece.team == team:
-                king = square
-                break
-
-    threats = ["king", "queen", "bishop", "knight", "rook", "pawn"]
-    for threat in threats:
-        attacks = []
-        if threat == "pawn":
-            generate_moves_pawn(chessboard, king, eat=attacks)
-        else:
-            exec("generate_moves_" + threat + "(attacks, king)")
-
-        if threat in ["king", "knight", "pawn"]:
-            for attack in attacks:
-                if is_square_within_board(attack):
-                    if (
-                            chessboard[attack].piece is not None and
-                            chessboard[attack].piece.type_ == threat
-                    ):
-                        if chessboard[attack].piece.team != team:
-                            check = True
-                            break
-
-        if threat in ["queen", "bishop", "rook"]:
-            for direction in attacks:
-                for attack in direction:
-                    if is_square_within_board(attack):
-                        if (
-                                chessboard[attack].piece is not None and
-                                chessboard[attack].piece.type_ == threat
-                        ):
-                            if chessboard[attack].piece.team != team:
-                                check = True
-                                break
-                    if is_direction_finished(chessboard, king, attack):
-                        break
-
-    return check
+    king = chessboard.kings[team]
+
+    for squares, threat in STEP_THREATS[team]:
+        for square in squares[king]:
+            attacker = chessboard[square].piece
+            if attacker is not None and attacker.type_ == threat and attacker.team != team:
+                return True
+
+    for rays, sliders in SLIDING_THREATS:
+        for ray in rays[king]:
+            for square in ray:
+                attacker = chessboard[square].piece
+                if attacker is not None:
+                    if attacker.type_ in sliders and attacker.team != team:
+                        return True
+                    break
+    return False
 
 
-def is_check_caused(chessboard, source, destination, team):
+def is_check_caused(chessboard, move, team):
     """
     Tests if the king of the current team is under check after a potential move would be executed.
     :param chessboard: Dict
-    :param source: Tuple
-    :param destination: Tuple
+    :param move: move.Move
     :param team: String
     :return: Bool
     """
-    do_move(chessboard, source, destination, check=True)
+    make_move(chessboard, move)
     king_state = is_king_under_check(chessboard, team)
-    clear_cached_move(chessboard)
+    unmake_move(chessboard)
     return king_state
 
 
-def is_valid_move_left(chessboard, team):
+def is_valid_move_left(chessboard, team, legality=None):
     """
-    Tests if the current team has any valid moves left.
+    Tests if the current team has any valid moves left, stopping at the first piece that can move.
+    The king is tried first, followed by the pieces whose moves are the cheapest to generate.
     :param chessboard: Dict
     :param team: String
+    :param legality: Dict, computed when not given
     :return: Bool
     """
-    any_moves_left = False
-    for square in chessboard:
-        if (
-                chessboard[square].piece is not None and
-                chessboard[square].piece.team == team
-        ):
-            highlight_potential_moves(chessboard, square, team)
-
-        for square_ in chessboard:
-            if (
-                    chessboard[square_].regular_move or
-                    chessboard[square_].eat_move or
-                    chessboard[square_].special_move
-            ):
-                any_moves_left = True
-
-        if any_moves_left:
-            break
+    if legality is None:
+        legality = get_legality(chessboard, team)
+    if len(legality["checkers"]) > 1:
+        squares = [legality["king"]]
+    else:
+        squares = sorted(
+            chessboard.pieces[team], key=lambda square: PIECE_ORDER.index(chessboard[square].piece.type_)
+        )
 
-    clear_selection_highlight(chessboard)
-    return any_moves_left
+    for square in squares:
+        moves = []
+        COLLECT_FUNCTIONS[chessboard[square].piece.type_](chessboard, moves, square, team, legality)
+        if moves:
+            return True
+    return False
 
 
 def is_checkmate_stalemate(chessboard, team):
     """
     Tests if a checkmate or a stalemate has occured for the current team.
+    A cached position is answered from the position cache, otherwise the search stops at the first legal move.
     :param chessboard: Dict
     :param team: String
     :return: String or False
     """
-    if not is_valid_move_left(chessboard, team):
-        if not is_king_under_check(chessboard, team):
+    entry = position_cache.get(get_position_key(chessboard, team))
+    if entry is not None:
+        moves, in_check = entry
+        if not moves:
+            return team if in_check else "stalemate"
+        return False
+
+    legality = get_legality(chessboard, team)
+    if not is_valid_move_left(chessboard, team, legality):
+        if not legality["checkers"]:
             return "stalemate"
         else:
             return team
     return False
+
+
+def is_insufficient_material(chessboard):
+    """
+    Tests if neither team can checkmate any more: only kings are left besides a single knight, or besides bishops that
+    all stand on squares of the same color. Only reads the material counts, no square is visited.
+    :param chessboard: Dict
+    :return: String or False
+    """
+    white = chessboard.material["w"]
+    black = chessboard.material["b"]
+    if white["pawn"] or black["pawn"] or white["rook"] or black["rook"] or white["queen"] or black["queen"]:
+        return False
+    knights = white["knight"] + black["knight"]
+    light = chessboard.bishop_colors["w"][0] + chessboard.bishop_colors["b"][0]
+    dark = chessboard.bishop_colors["w"][1] + chessboard.bishop_colors["b"][1]
+    if knights == 0 and (light == 0 or dark == 0) or knights == 1 and light + dark == 0:
+        return "insufficient_material"
+    return False
+
+
+def is_draw(chessboard):
+    """
+    Tests if the game is drawn by the fifty-move rule or by threefold repetition.
+    A position can only repeat since the last capture or pawn move, so at most the last halfmove clock entries of the
+    position hashes are compared, every second one as the same team has to be on move. The fifty-move rule ends the
+    game after 100 halfmoves, which bounds the scan.
+    :param chessboard: Dict
+    :return: String or False
+    """
+    if chessboard.halfmove_clock >= 100:
+        return "fifty_moves"
+    hashes = chessboard.position_hashes
+    current = len(hashes) - 1
+    first = max(0, current - chessboard.halfmove_clock)
+    repetitions = 1
+    for index in range(current - 2, first - 1, -2):
+        if hashes[index] == hashes[current]:
+            repetitions += 1
+            if repetitions == 3:
+                return "repetition"
+    return False
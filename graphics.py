@@ -1,35 +1,116 @@
 """
 Definitions of all functions that will be handling the gui.
-Loading of necessary images used in the gui.
+Atlas of the images used in the gui, every image is loaded once and shared by all squares showing it.
 """
 
 
+from collections import OrderedDict
 import pygame
 import piece
+import square as sq
 import board as brd
 import globals as glb
 
 
-eat_img = pygame.image.load("images/eat.png")
-spec_img = pygame.image.load("images/spec.png")
-move_img = pygame.image.load("images/move.png")
-w_checkmate_img = pygame.image.load("images/w_checkmate.png")
-b_checkmate_img = pygame.image.load("images/b_checkmate.png")
-stalemate_img = pygame.image.load("images/stalemate.png")
+SPRITE_NAMES = list(brd.basic_pieces) + ["move", "spec", "eat", "w_checkmate", "b_checkmate", "stalemate"]
+SCALED_SPRITE_LIMIT = 64
 
+# Draw result of gameplay.is_draw or gameplay.is_insufficient_material: lines of the end message, drawn as text
+# as there is no image for them.
+DRAW_MESSAGES = {
+    "repetition": ["DRAW!", "threefold repetition"], "fifty_moves": ["DRAW!", "fifty-move rule"],
+    "insufficient_material": ["DRAW!", "insufficient material"]
+}
 
-def get_clicked_square():
+# Sprite key: image converted to the display format, filled on first use because converting needs a display.
+sprites = {}
+
+# (sprite key, square width): sprite scaled for that square width, least recently used first.
+scaled_sprites = OrderedDict()
+
+# Square: piece covered by a piece of the promotion choice while the choice is shown.
+promotion_covered = {}
+
+# Window drawn to and its size, pre-rendered empty board, the state of every square in the last frame and the
+# font of the profiling overlay.
+rendered = {"window": None, "size": None, "background": None, "squares": {}, "font": None}
+
+
+def get_sprite(key):
+    """
+    Returns the image of a sprite key such as "w_king" or "move", loading and converting it on first use.
+    :param key: String
+    :return: pygame.Surface
+    """
+    sprite = sprites.get(key)
+    if sprite is None:
+        sprite = sprites[key] = pygame.image.load("images/" + key + ".png").convert_alpha()
+    return sprite
+
+
+def get_scaled_sprite(key, width):
+    """
+    Returns the image of a sprite key scaled for squares of the given width.
+    Scaled images are cached per width, the least recently used ones are dropped above SCALED_SPRITE_LIMIT.
+    :param key: String
+    :param width: Integer
+    :return: pygame.Surface
+    """
+    if width == glb.SQUAREWIDTH:
+        return get_sprite(key)
+    sprite = scaled_sprites.get((key, width))
+    if sprite is None:
+        native = get_sprite(key)
+        size = [max(1, round(length * width / glb.SQUAREWIDTH)) for length in native.get_size()]
+        sprite = scaled_sprites[(key, width)] = pygame.transform.smoothscale(native, size)
+        if len(scaled_sprites) > SCALED_SPRITE_LIMIT:
+            scaled_sprites.popitem(last=False)
+    else:
+        scaled_sprites.move_to_end((key, width))
+    return sprite
+
+
+def load_sprites():
+    """
+    Loads every sprite of the gui into the atlas.
+    :return: None
+    """
+    for key in SPRITE_NAMES:
+        get_sprite(key)
+
+
+def get_square_width(win):
     """
-    Returns the row and column of a clicked square.
+    Returns the width of the squares of the largest board, grid lines included, that fits into the window.
+    :param win: pygame.Surface
+    :return: Integer
+    """
+    return max(1, (min(win.get_size()) - 1) // 8)
+
+
+def get_square_rect(win, square):
+    """
+    Returns the rectangle a square covers in the window.
+    :param win: pygame.Surface
+    :param square: square.Square
+    :return: pygame.Rect
+    """
+    width = get_square_width(win)
+    return pygame.Rect(square.row * width, square.col * width, width, width)
+
+
+def get_clicked_square(mouse_position=None):
+    """
+    Returns the row and column of a clicked square in the current window size.
+    The position of the click event is used when given, the current mouse position otherwise.
+    :param mouse_position: Tuple
     :return: Tuple
     """
-    mouse_position = pygame.mouse.get_pos()
-    i = mouse_position[0] // glb.SQUAREWIDTH
-    j = mouse_position[1] // glb.SQUAREWIDTH
-    if i == 8:
-        i = 7
-    if j == 8:
-        j = 7
+    if mouse_position is None:
+        mouse_position = pygame.mouse.get_pos()
+    width = get_square_width(pygame.display.get_surface())
+    i = min(mouse_position[0] // width, 7)
+    j = min(mouse_position[1] // width, 7)
     return i, j
 
 
@@ -43,12 +124,12 @@ def fill_color(win, square, color=None):
     """
     if not color:
         color = square.color
-    pygame.draw.rect(win, color, square.rect)
+    pygame.draw.rect(win, color, get_square_rect(win, square))
 
 
 def fill_image(win, square, image=None):
     """
-    Places an image inside of a single square.
+    Places an image inside of a single square, the image of its piece when none is given.
     :param win: pygame.Surface
     :param square: square.Square
     :param image: pygame.Surface
@@ -56,36 +137,53 @@ def fill_image(win, square, image=None):
     """
     if not image:
         if square.piece:
-            win.blit(square.piece.image, (square.x, square.y))
-    else:
-        win.blit(image, (square.x, square.y))
+            image = get_scaled_sprite(square.piece.sprite, get_square_width(win))
+        else:
+            return
+    win.blit(image, get_square_rect(win, square))
+
+
+def get_square_state(square):
+    """
+    Returns everything that decides how a square looks, to find the squares that changed since the last frame.
+    :param square: square.Square
+    :return: Tuple
+    """
+    flags = square.flags[square.index]
+    marker = None
+    if flags & sq.EAT_MOVE:
+        marker = "eat"
+    elif flags & sq.SPECIAL_MOVE:
+        marker = "spec"
+    elif flags & sq.REGULAR_MOVE:
+        marker = "move"
+    sprite = square.piece.sprite if square.piece else None
+    return bool(flags & sq.SELECTED_PIECE or square.former_move), marker, sprite
 
 
 def draw_square(win, square):
     """
-    Fills the background and places an image of a single square.
+    Fills the background, places the images and redraws the grid lines of a single square at the window size.
     :param win: pygame.Surface
     :param square: square.Square
     :return: None
     """
-    color = None
-    image = None
+    highlighted, marker, sprite = get_square_state(square)
+    rect = get_square_rect(win, square)
 
-    if square.selected_piece or square.former_move:
+    color = None
+    if highlighted:
         color = glb.SELECTED
     fill_color(win, square, color)
 
-    if square.regular_move:
-        image = move_img
-    if square.special_move:
-        image = spec_img
-    if square.eat_move:
-        image = eat_img
-    fill_image(win, square, image)
-
-    if square.piece:
+    if marker is not None:
+        fill_image(win, square, get_scaled_sprite(marker, rect.width))
+    if sprite is not None:
         fill_image(win, square)
 
+    pygame.draw.line(win, glb.BLACK, rect.topleft, (rect.right - 1, rect.top))
+    pygame.draw.line(win, glb.BLACK, rect.topleft, (rect.left, rect.bottom - 1))
+
 
 def draw_lines(win):
     """
@@ -93,24 +191,91 @@ def draw_lines(win):
     :param win: pygame.Surface
     :return: None
     """
+    width = get_square_width(win)
     for i in range(9):
-        pygame.draw.line(win, glb.BLACK, (0, i * glb.SQUAREWIDTH), (glb.BOARDWIDTH, i * glb.SQUAREWIDTH))
-        for j in range(9):
-            pygame.draw.line(win, glb.BLACK, (j * glb.SQUAREWIDTH, 0), (j * glb.SQUAREWIDTH, glb.BOARDWIDTH))
+        pygame.draw.line(win, glb.BLACK, (0, i * width), (8 * width, i * width))
+        pygame.draw.line(win, glb.BLACK, (i * width, 0), (i * width, 8 * width))
+
+
+def draw_background(win, chessboard):
+    """
+    Returns a surface of the window size with the empty chessboard and its grid lines.
+    :param win: pygame.Surface
+    :param chessboard: Dict
+    :return: pygame.Surface
+    """
+    background = pygame.Surface(win.get_size()).convert()
+    background.fill(glb.WHITEFIELD)
+    for square in chessboard.values():
+        fill_color(background, square)
+    draw_lines(background)
+    return background
+
+
+def invalidate_chessboard():
+    """
+    Forgets what was drawn, so the next frame redraws the whole window.
+    :return: None
+    """
+    rendered["window"] = None
+    rendered["squares"].clear()
 
 
 def draw_chessboard(win, chessboard):
     """
-    Draws the entire state of the chessboard.
+    Draws the squares that changed since the last frame and updates only their part of the display.
+    The first frame in a window, or after the window was resized, starts from the pre-rendered empty board.
     :param win: pygame.Surface
     :param chessboard: Dict
     :return: None
     """
-    for row in range(8):
-        for col in range(8):
-            draw_square(win, chessboard[(row, col)])
-    draw_lines(win)
-    pygame.display.update()
+    if rendered["window"] is not win or rendered["size"] != win.get_size():
+        if rendered["background"] is None or rendered["background"].get_size() != win.get_size():
+            rendered["background"] = draw_background(win, chessboard)
+        win.blit(rendered["background"], (0, 0))
+        rendered["window"] = win
+        rendered["size"] = win.get_size()
+        rendered["squares"].clear()
+        dirty = [win.get_rect()]
+    else:
+        dirty = []
+
+    for position, square in chessboard.items():
+        state = get_square_state(square)
+        if rendered["squares"].get(position) != state:
+            draw_square(win, square)
+            rendered["squares"][position] = state
+            dirty.append(get_square_rect(win, square))
+
+    if dirty:
+        pygame.display.update(dirty)
+
+
+def draw_overlay(win, lines):
+    """
+    Draws text lines over the top left corner of the window and updates only their part of the display.
+    The squares under the overlay are forgotten, so the next frame redraws them before drawing the overlay again.
+    :param win: pygame.Surface
+    :param lines: List of strings
+    :return: None
+    """
+    if rendered["font"] is None:
+        pygame.font.init()
+        rendered["font"] = pygame.font.SysFont("monospace", 12)
+    font = rendered["font"]
+    line_height = font.get_linesize()
+    width = max([font.size(line)[0] for line in lines] + [1])
+    panel = pygame.Surface((width + 8, len(lines) * line_height + 8))
+    win.blit(panel, (0, 0))
+    for index, line in enumerate(lines):
+        win.blit(font.render(line, True, (255, 255, 255)), (4, 4 + index * line_height))
+
+    overlay_rect = panel.get_rect()
+    square_width = get_square_width(win)
+    for row, col in list(rendered["squares"]):
+        if overlay_rect.colliderect((row * square_width, col * square_width, square_width, square_width)):
+            del rendered["squares"][(row, col)]
+    pygame.display.update(overlay_rect)
 
 
 def set_promotion_display(chessboard, clicked_square):
@@ -126,35 +291,56 @@ def set_promotion_display(chessboard, clicked_square):
         direction = -1
 
     offset = [(clicked_square[0], (clicked_square[1] + i * direction)) for i in range(4)]
-    pieces = [chessboard[clicked_square].piece.team + "_" + p for p in ["queen", "bishop", "knight", "rook"]]
-    promotion_choices = zip(offset, pieces)
+    team = chessboard[clicked_square].piece.team
+    promotion_choices = zip(offset, ["queen", "bishop", "knight", "rook"])
 
     for promotion_choice in promotion_choices:
-        chessboard[promotion_choice[0]].piece_cache = chessboard[promotion_choice[0]].piece
-        chessboard[promotion_choice[0]].piece = eval(brd.basic_pieces[promotion_choice[1]])
+        promotion_covered[promotion_choice[0]] = chessboard[promotion_choice[0]].piece
+        chessboard[promotion_choice[0]].piece = piece.create_piece(team, promotion_choice[1])
         chessboard[promotion_choice[0]].promotion_in_progress = True
         chessboard[promotion_choice[0]].former_move = True
 
 
-def reset_promotion_display(chessboard, promotion_field):
+def reset_promotion_display(chessboard, clicked_square):
     """
     Removes the piece choice gui after the choice is made and reverts the previous state of the chessboard.
+    The promotion field is found among the squares covered by set_promotion_display in the clicked file.
     :param chessboard: Dict
-    :param promotion_field: Tuple
-    :return: None
+    :param clicked_square: Tuple
+    :return: Tuple
     """
-    if chessboard[promotion_field].col == 0:
-        direction = 1
-    elif chessboard[promotion_field].col == 7:
-        direction = -1
+    offset = [square for square in promotion_covered if square[0] == clicked_square[0]]
+    promotion_field = next(square for square in offset if square[1] in [0, 7])
+    choice = chessboard[clicked_square].piece.type_
 
-    offset = [(promotion_field[0], (promotion_field[1] + i * direction)) for i in range(4)]
     for offset_val in offset:
-        chessboard[offset_val].piece = chessboard[offset_val].piece_cache
-        chessboard[offset_val].piece_cache = None
+        chessboard[offset_val].piece = promotion_covered.pop(offset_val)
         chessboard[offset_val].promotion_in_progress = False
-        if offset_val[1] in [2, 3, 4, 5]:
-            chessboard[offset_val].former_move = False
+        chessboard[offset_val].former_move = offset_val in chessboard.former_moves
+
+    return promotion_field, choice
+
+
+def draw_end_message(win, rect, lines):
+    """
+    Draws lines of text centered in a rectangle on a white background, the first line twice as large.
+    :param win: pygame.Surface
+    :param rect: Tuple
+    :param lines: List of strings
+    :return: None
+    """
+    pygame.font.init()
+    rect = pygame.Rect(rect)
+    pygame.draw.rect(win, (255, 255, 255), rect)
+    size = max(8, rect.height // 6)
+    images = []
+    for index, line in enumerate(lines):
+        font = pygame.font.SysFont("serif", 2 * size if index == 0 else size)
+        images.append(font.render(line, True, glb.BLACK))
+    y = rect.centery - sum(image.get_height() for image in images) // 2
+    for image in images:
+        win.blit(image, image.get_rect(centerx=rect.centerx, top=y))
+        y += image.get_height()
 
 
 def draw_end_prompt(win, end_result):
@@ -164,19 +350,22 @@ def draw_end_prompt(win, end_result):
     :param end_result: String
     :return: None
     """
-    x = 2 * glb.SQUAREWIDTH
-    y = 3 * glb.SQUAREWIDTH
-    width = 4 * glb.SQUAREWIDTH + 1
-    height = 2 * glb.SQUAREWIDTH + 1
+    square_width = get_square_width(win)
+    x = 2 * square_width
+    y = 3 * square_width
+    width = 4 * square_width + 1
+    height = 2 * square_width + 1
     rect_outline = (x, y, width, height)
     rect_fill = (x+1, y+1, width-2, height-2)
     pygame.draw.rect(win, (255, 0, 0), rect_outline, 1)
 
     if end_result == "b":
-        win.blit(w_checkmate_img, (x + 1, y + 1))
+        win.blit(get_scaled_sprite("w_checkmate", square_width), (x + 1, y + 1))
     if end_result == "w":
-        win.blit(b_checkmate_img, (x + 1, y + 1))
+        win.blit(get_scaled_sprite("b_checkmate", square_width), (x + 1, y + 1))
     if end_result == "stalemate":
-        win.blit(stalemate_img, (x + 1, y + 1))
+        win.blit(get_scaled_sprite("stalemate", square_width), (x + 1, y + 1))
+    if end_result in DRAW_MESSAGES:
+        draw_end_message(win, rect_fill, DRAW_MESSAGES[end_result])
 
     pygame.display.update()
@@ -0,0 +1,16 @@
+"""
+Definition of a single chess move.
+"""
+
+
+from collections import namedtuple
+
+
+class Move(namedtuple("Move", ["source", "destination", "kind", "promotion"], defaults=[None])):
+    """
+    Compact description of a legal move.
+    Contains the source and destination squares, the kind of the move named after its move flag on the square
+    (regular_move, eat_move, double_move, castle_move, enpassant_move or promotion_move) and the chosen piece type
+    for promotions. Castling moves go between the king and rook squares, like the castling clicks in the gui.
+    """
+    __slots__ = ()
@@ -0,0 +1,184 @@
+"""
+Perft: counts the leaf nodes of the legal move tree to measure the speed and the correctness of the move generator.
+The counts are compared to the published values of standard test positions.
+Usage from the project root: python perft.py --position kiwipete --depth 3
+"""
+
+
+import argparse
+import sys
+import time
+import bitboard
+import board as brd
+import fen
+import gameplay as gpl
+
+
+POSITIONS = {
+    "start": {
+        "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "expected": [20, 400, 8902, 197281, 4865609]
+    },
+    "kiwipete": {
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "expected": [48, 2039, 97862, 4085603]
+    },
+    "endgame": {
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "expected": [14, 191, 2812, 43238, 674624]
+    },
+    "promotions": {
+        "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "expected": [6, 264, 9467, 422333]
+    },
+    "pins": {
+        "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "expected": [44, 1486, 62379, 2103487]
+    }
+}
+
+
+def setup_chessboard(position):
+    """
+    Builds the chessboard dictionary and the team to move for one of the test positions.
+    :param position: Dict
+    :return: Tuple
+    """
+    return fen.load_fen(position["fen"])
+
+
+def move_name(source, destination, kind, promotion):
+    """
+    Names a move by its source and destination squares, castling by the square the king lands on.
+    :param source: Tuple
+    :param destination: Tuple
+    :param kind: String
+    :param promotion: String
+    :return: String
+    """
+    if kind == "castle_move":
+        destination = (6 if destination[0] == 7 else 2, destination[1])
+    name = brd.square_name(source) + brd.square_name(destination)
+    if promotion is not None:
+        name += "n" if promotion == "knight" else promotion[0]
+    return name
+
+
+def perft_chessboard(chessboard, team, depth):
+    """
+    Counts leaf nodes with the gameplay rules on the chessboard dictionary.
+    :param chessboard: Dict
+    :param team: String
+    :param depth: Integer
+    :return: Integer
+    """
+    if depth == 0:
+        return 1
+    moves = gpl.generate_legal_moves(chessboard, team)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        gpl.make_move(chessboard, move)
+        nodes += perft_chessboard(chessboard, gpl.switch_active_team(team), depth - 1)
+        gpl.unmake_move(chessboard)
+    return nodes
+
+
+def divide_chessboard(chessboard, team, depth):
+    """
+    Counts leaf nodes below every root move with the gameplay rules.
+    :param chessboard: Dict
+    :param team: String
+    :param depth: Integer
+    :return: List
+    """
+    counts = []
+    for move in gpl.generate_legal_moves(chessboard, team):
+        gpl.make_move(chessboard, move)
+        counts.append((move_name(*move), perft_chessboard(chessboard, gpl.switch_active_team(team), depth - 1)))
+        gpl.unmake_move(chessboard)
+    return counts
+
+
+def divide_bitboard(position, depth):
+    """
+    Counts leaf nodes below every root move with the bitboard backend.
+    :param position: bitboard.Position
+    :param depth: Integer
+    :return: List
+    """
+    counts = []
+    for move in position.generate_legal_moves():
+        position.make_move(move)
+        source, destination, kind, promotion = bitboard.decode_move(move)
+        name = move_name(bitboard.index_square(source), bitboard.index_square(destination), kind, promotion)
+        counts.append((name, position.perft(depth - 1)))
+        position.unmake_move()
+    return counts
+
+
+def run_position(name, depth, backend, divide):
+    """
+    Runs perft for every depth up to the given one, prints the results and compares them to the expected counts.
+    :param name: String
+    :param depth: Integer
+    :param backend: String
+    :param divide: Bool
+    :return: Bool
+    """
+    position = POSITIONS[name]
+    chessboard, team = setup_chessboard(position)
+    if backend == "bitboard":
+        bitboard_position = bitboard.from_chessboard(chessboard, team)
+
+    print("position {} ({})".format(name, backend))
+    correct = True
+    for current_depth in range(1, depth + 1):
+        start = time.perf_counter()
+        if current_depth == depth and divide:
+            if backend == "bitboard":
+                counts = divide_bitboard(bitboard_position, current_depth)
+            else:
+                counts = divide_chessboard(chessboard, team, current_depth)
+            nodes = sum(count for _, count in counts)
+        elif backend == "bitboard":
+            nodes = bitboard_position.perft(current_depth)
+        else:
+            nodes = perft_chessboard(chessboard, team, current_depth)
+        elapsed = time.perf_counter() - start
+
+        if current_depth <= len(position["expected"]):
+            expected = position["expected"][current_depth - 1]
+            status = "ok" if nodes == expected else "MISMATCH (expected {})".format(expected)
+            correct = correct and nodes == expected
+        else:
+            status = "no reference"
+        print("  depth {:2d} {:12d} nodes {:9.3f} s {:12.0f} nodes/s  {}".format(
+            current_depth, nodes, elapsed, nodes / elapsed if elapsed else 0, status
+        ))
+
+    if divide:
+        print("  divide at depth {}:".format(depth))
+        for move, count in sorted(counts):
+            print("    {:6s} {}".format(move, count))
+    return correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--position", default="all", choices=["all"] + list(POSITIONS))
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", default="gameplay", choices=["gameplay", "bitboard"])
+    parser.add_argument("--no-divide", dest="divide", action="store_false")
+    args = parser.parse_args()
+
+    names = list(POSITIONS) if args.position == "all" else [args.position]
+    correct = True
+    for name in names:
+        correct = run_position(name, args.depth, args.backend, args.divide) and correct
+    sys.exit(0 if correct else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Streaming reader of Portable Game Notation (PGN) archives.
+Games are read one at a time from the file, their SAN moves are resolved against the legal moves of the gameplay
+rules and every game is yielded as soon as it is validated, so memory use does not grow with the size of the archive.
+Usage from the project root: python pgn.py games.pgn
+"""
+
+
+import argparse
+import re
+import sys
+import time
+import board as brd
+import fen
+import gameplay as gpl
+
+
+RESULTS = ["1-0", "0-1", "1/2-1/2", "*"]
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comments in braces or after a semicolon, variation brackets and everything else up to white space.
+TOKEN_PATTERN = re.compile(r"\{[^}]*\}?|;[^\n]*|[()]|[^\s(){};]+")
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.*")
+SAN_PIECES = {"K": "king", "Q": "queen", "R": "rook", "B": "bishop", "N": "knight"}
+PIECE_SAN = {type_: letter for letter, type_ in SAN_PIECES.items()}
+
+
+def read_games(file):
+    """
+    Splits a PGN text stream into games, reading it line by line.
+    :param file: Text file object or any iterable of lines
+    :return: Generator of dicts with the tags and the movetext of every game
+    """
+    tags = {}
+    movetext = []
+    for line in file:
+        line = line.strip()
+        if line.startswith("%"):
+            continue
+        tag = TAG_PATTERN.match(line) if line.startswith("[") else None
+        if tag is not None:
+            if movetext:
+                yield {"tags": tags, "movetext": "\n".join(movetext)}
+                tags = {}
+                movetext = []
+            tags[tag.group(1)] = tag.group(2).replace('\\"', '"').replace("\\\\", "\\")
+        elif line:
+            movetext.append(line)
+    if tags or movetext:
+        yield {"tags": tags, "movetext": "\n".join(movetext)}
+
+
+def tokenize_movetext(movetext):
+    """
+    Returns the SAN moves of the main line of a movetext and its result token, skipping move numbers, comments,
+    numeric annotation glyphs and variations.
+    :param movetext: String
+    :return: Tuple of a list and a string or None
+    """
+    sans = []
+    result = None
+    depth = 0
+    for token in TOKEN_PATTERN.findall(movetext):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0 and token[0] not in "{;$":
+            if token in RESULTS:
+                result = token
+                continue
+            token = MOVE_NUMBER_PATTERN.sub("", token)
+            if token:
+                sans.append(token)
+    return sans, result
+
+
+def parse_san(san):
+    """
+    Splits a SAN move such as "Nbxd7+", "exd6", "e8=Q" or "O-O" into the moving piece type, the destination square,
+    the source square hint and the promotion piece type. Castling has the row of the rook as destination and no hint.
+    :param san: String
+    :return: Tuple
+    """
+    text = san.rstrip("+#!?")
+    if text in ["O-O", "0-0"]:
+        return "castle", 7, "", None
+    if text in ["O-O-O", "0-0-0"]:
+        return "castle", 0, "", None
+
+    promotion = None
+    if "=" in text:
+        text, letter = text.split("=", 1)
+        promotion = SAN_PIECES.get(letter.upper())
+        if promotion is None or promotion == "king":
+            raise ValueError("promotion piece of {} is not valid".format(san))
+    elif len(text) > 2 and text[-1].upper() in "QRBN" and text[-2] in "18":
+        promotion = SAN_PIECES[text[-1].upper()]
+        text = text[:-1]
+
+    type_ = "pawn"
+    if text[:1] in SAN_PIECES:
+        type_ = SAN_PIECES[text[0]]
+        text = text[1:]
+    text = text.replace("x", "").replace(":", "")
+    if len(text) < 2 or text[-2] not in brd.FILES or text[-1] not in "12345678":
+        raise ValueError("move {} is not valid SAN".format(san))
+    hint = text[:-2]
+    if any(character not in brd.FILES and character not in "12345678" for character in hint):
+        raise ValueError("move {} is not valid SAN".format(san))
+    return type_, brd.square_from_name(text[-2:]), hint, promotion
+
+
+def resolve_san(chessboard, team, san):
+    """
+    Finds the legal move of the team to move a SAN move stands for.
+    Only the moves of the pieces of the moving type are generated, castling is looked up among the king moves.
+    :param chessboard: Dict
+    :param team: String
+    :param san: String
+    :return: move.Move
+    """
+    type_, destination, hint, promotion = parse_san(san)
+    legality = gpl.get_legality(chessboard, team)
+    moves = []
+    for square in list(chessboard.pieces[team]):
+        piece_type = chessboard[square].piece.type_
+        if piece_type == type_ or type_ == "castle" and piece_type == "king":
+            gpl.COLLECT_FUNCTIONS[piece_type](chessboard, moves, square, team, legality)
+
+    if type_ == "castle":
+        for move in moves:
+            if move.kind == "castle_move" and move.destination[0] == destination:
+                return move
+        raise ValueError("castling {} is not legal".format(san))
+
+    candidates = []
+    for move in moves:
+        if move.destination == destination and move.kind != "castle_move" and move.promotion == promotion:
+            source = brd.square_name(move.source)
+            if all(character in source for character in hint):
+                candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError("move {} is {}".format(san, "ambiguous" if candidates else "not legal"))
+    return candidates[0]
+
+
+def move_to_san(chessboard, team, move, moves):
+    """
+    Writes a legal move of the team to move in SAN, with the check or checkmate suffix.
+    :param chessboard: Dict
+    :param team: String
+    :param move: move.Move
+    :param moves: List of the legal moves of the team
+    :return: String
+    """
+    moved_piece = chessboard[move.source].piece
+    if move.kind == "castle_move":
+        san = "O-O" if move.destination[0] == 7 else "O-O-O"
+    else:
+        destination = brd.square_name(move.destination)
+        capture = chessboard[move.destination].piece is not None or move.kind == "enpassant_move"
+        if moved_piece.type_ == "pawn":
+            san = (brd.square_name(move.source)[0] + "x" if capture else "") + destination
+            if move.promotion is not None:
+                san += "=" + PIECE_SAN[move.promotion]
+        else:
+            rivals = [
+                other.source for other in moves
+                if other.destination == move.destination and other.source != move.source and
+                other.kind != "castle_move" and chessboard[other.source].piece.type_ == moved_piece.type_
+            ]
+            source = brd.square_name(move.source)
+            hint = ""
+            if rivals:
+                if all(rival[0] != move.source[0] for rival in rivals):
+                    hint = source[0]
+                elif all(rival[1] != move.source[1] for rival in rivals):
+                    hint = source[1]
+                else:
+                    hint = source
+            san = PIECE_SAN[moved_piece.type_] + hint + ("x" if capture else "") + destination
+
+    gpl.make_move(chessboard, move)
+    replies, in_check = gpl.get_legal_moves(chessboard, gpl.switch_active_team(team))
+    gpl.unmake_move(chessboard)
+    if in_check:
+        san += "+" if replies else "#"
+    return san
+
+
+def play_game(game, chessboard=None):
+    """
+    Plays the moves of a game read by read_games from its starting position, the FEN tag when it has one.
+    The first move that can not be resolved stops the game and is reported as its error.
+    :param game: Dict
+    :param chessboard: board.Chessboard, reused when given
+    :return: Dict with the tags, the legal moves played, the result, the error or None and the chessboard and team
+        to move after the last legal move
+    """
+    tags = game["tags"]
+    sans, result = tokenize_movetext(game["movetext"])
+    played = []
+    error = None
+    try:
+        chessboard, team = fen.load_fen(tags.get("FEN", fen.STARTING_FEN), chessboard)
+    except ValueError as exception:
+        return {
+            "tags": tags, "moves": played, "result": result, "error": str(exception), "chessboard": None, "team": None
+        }
+
+    for ply, san in enumerate(sans):
+        try:
+            move = resolve_san(chessboard, team, san)
+        except ValueError as exception:
+            error = "ply {}: {}".format(ply + 1, exception)
+            break
+        gpl.make_move(chessboard, move)
+        played.append(move)
+        team = gpl.switch_active_team(team)
+
+    return {
+        "tags": tags, "moves": played, "result": result or tags.get("Result"), "error": error,
+        "chessboard": chessboard, "team": team
+    }
+
+
+def read_pgn(path, skip_illegal=False):
+    """
+    Reads and validates the games of a PGN file one at a time.
+    All games share one chessboard, which holds the final position of a game until the next game is read.
+    :param path: String
+    :param skip_illegal: Bool, leave out games with an error instead of yielding them flagged
+    :return: Generator of the dicts returned by play_game
+    """
+    chessboard = None
+    with open(path, encoding="utf-8", errors="replace") as file:
+        for game in read_games(file):
+            played = play_game(game, chessboard)
+            chessboard = played["chessboard"] or chessboard
+            if played["error"] is None or not skip_illegal:
+                yield played
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="PGN file")
+    parser.add_argument("--quiet", action="store_true", help="do not list the games with illegal moves")
+    args = parser.parse_args()
+
+    games = moves = illegal = 0
+    start = time.perf_counter()
+    for number, game in enumerate(read_pgn(args.path), 1):
+        games += 1
+        moves += len(game["moves"])
+        if game["error"] is not None:
+            illegal += 1
+            if not args.quiet:
+                print("game {} ({} - {}): {}".format(
+                    number, game["tags"].get("White", "?"), game["tags"].get("Black", "?"), game["error"]
+                ))
+    elapsed = time.perf_counter() - start
+    print("{} games, {} moves, {} with errors in {:.2f} s: {:.0f} games/s, {:.0f} moves/s".format(
+        games, moves, illegal, elapsed, games / elapsed if elapsed else 0, moves / elapsed if elapsed else 0
+    ))
+    sys.exit(1 if illegal else 0)
+
+
+if __name__ == '__main__':
+    main()
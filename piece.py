@@ -6,17 +6,18 @@ Definitions of chess piece types.
 class Piece:
     """
     General definition for all piece types.
-    Contains information about team, piece type and piece image.
+    Contains information about team and piece type, and the key of the shared sprite the gui draws the piece with.
     """
-    def __init__(self, team, type_, image):
+    __slots__ = ("team", "type_", "sprite")
+
+    def __init__(self, team, type_):
         """
         :param team: String
         :param type_: String
-        :param image: pygame.Surface
         """
         self.team = team
-        self.piece = type_
-        self.image = image
+        self.type_ = type_
+        self.sprite = team + "_" + type_
 
 
 Queen = Piece
@@ -29,8 +30,10 @@ class Pawn(Piece):
     Specific definition of the Pawn piece.
     Adds attribute for tracking if the piece executed a double move.
     """
-    def __init__(self, team, type_, image):
-        super().__init__(team, type_, image)
+    __slots__ = ("double_move",)
+
+    def __init__(self, team, type_):
+        super().__init__(team, type_)
         self.double_move = False
 
 
@@ -39,9 +42,24 @@ class Rook(Piece):
     Specific definition of the Rook piece.
     Adds attribute for tracking if the piece has moved.
     """
-    def __init__(self, team, type_, image):
-        super().__init__(team, type_, image)
+    __slots__ = ("moved",)
+
+    def __init__(self, team, type_):
+        super().__init__(team, type_)
         self.moved = False
 
 
 King = Rook
+
+
+piece_classes = {"king": King, "queen": Queen, "rook": Rook, "bishop": Bishop, "knight": Knight, "pawn": Pawn}
+
+
+def create_piece(team, type_):
+    """
+    Creates a piece of the given team and type.
+    :param team: String
+    :param type_: String
+    :return: piece.Piece
+    """
+    return piece_classes[type_](team, type_)
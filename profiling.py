@@ -0,0 +1,140 @@
+"""
+Opt-in profiling of the hot functions of the game.
+Instrumented functions are replaced in their module by wrappers counting calls and wall time, functions that are
+not instrumented are left untouched, so profiling costs nothing until it is enabled.
+The statistics can be dumped as JSON or shown by the gui as an overlay.
+"""
+
+
+import functools
+import json
+import statistics
+import time
+from collections import deque
+
+
+RECENT_SAMPLES = 1000
+
+HOT_FUNCTIONS = {
+    "gameplay": [
+        "highlight_potential_moves", "is_check_caused", "is_king_under_check", "is_valid_move_left",
+        "is_checkmate_stalemate", "do_move", "apply_move"
+    ],
+    "graphics": ["draw_chessboard"]
+}
+
+# Qualified function name: calls, total and longest wall time and the most recent call times, in seconds.
+stats = {}
+
+
+def profiled(name, function):
+    """
+    Wraps a function so that every call is counted and timed under the given name.
+    :param name: String
+    :param function: Function
+    :return: Function
+    """
+    entry = stats.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=RECENT_SAMPLES)})
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            entry["calls"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            entry["recent"].append(elapsed)
+
+    return wrapper
+
+
+def instrument(module, names=None):
+    """
+    Replaces functions of a module by profiled wrappers, by default its functions listed in HOT_FUNCTIONS.
+    Functions that are already instrumented are skipped.
+    :param module: Module
+    :param names: List
+    :return: None
+    """
+    if names is None:
+        names = HOT_FUNCTIONS[module.__name__]
+    for name in names:
+        function = getattr(module, name)
+        if not hasattr(function, "__wrapped__"):
+            setattr(module, name, profiled(module.__name__ + "." + name, function))
+
+
+def uninstrument(module):
+    """
+    Restores the original functions of a module.
+    :param module: Module
+    :return: None
+    """
+    for name, function in list(vars(module).items()):
+        if callable(function) and hasattr(function, "__wrapped__"):
+            setattr(module, name, function.__wrapped__)
+
+
+def reset():
+    """
+    Clears all statistics.
+    :return: None
+    """
+    for entry in stats.values():
+        entry.update(calls=0, total=0.0, max=0.0)
+        entry["recent"].clear()
+
+
+def percentile(samples, fraction):
+    """
+    Returns the sample below which the given fraction of the samples lies.
+    :param samples: List, sorted
+    :param fraction: Float between 0 and 1
+    :return: Float
+    """
+    return samples[int(fraction * (len(samples) - 1))]
+
+
+def report():
+    """
+    Returns the statistics of every profiled function that was called, in milliseconds, slowest in total first.
+    The median and 95th percentile are taken over the most recent calls.
+    :return: Dict
+    """
+    result = {}
+    for name, entry in sorted(stats.items(), key=lambda item: -item[1]["total"]):
+        if entry["calls"]:
+            recent = sorted(entry["recent"])
+            result[name] = {
+                "calls": entry["calls"],
+                "total_ms": entry["total"] * 1000,
+                "mean_ms": entry["total"] / entry["calls"] * 1000,
+                "median_ms": statistics.median(recent) * 1000,
+                "p95_ms": percentile(recent, 0.95) * 1000,
+                "max_ms": entry["max"] * 1000
+            }
+    return result
+
+
+def report_lines():
+    """
+    Returns the statistics as short text lines for the overlay.
+    :return: List
+    """
+    return [
+        "{:<34s} {:7d} calls {:9.1f} ms {:7.3f} ms/call".format(name, row["calls"], row["total_ms"], row["mean_ms"])
+        for name, row in report().items()
+    ]
+
+
+def dump(path):
+    """
+    Writes the statistics to a JSON file.
+    :param path: String
+    :return: None
+    """
+    with open(path, "w") as file:
+        json.dump(report(), file, indent=2)
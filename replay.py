@@ -0,0 +1,132 @@
+"""
+Replays a game recorded with python chess.py --record FILE without a display and at full speed.
+Reports the latency of every kind of click, from the click to the updated frame, and the render time of the frames.
+Usage from the project root: python replay.py session.json --repeat 5
+"""
+
+
+import argparse
+import json
+import os
+import time
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+import board as brd
+import chess
+import gameplay as gpl
+import graphics as gui
+import move as mv
+import profiling
+
+
+# Click kinds of chess.click_square timed as select -> highlight and move -> end of turn check, promotion choices
+# end the turn like moves.
+LATENCY_KINDS = {"select": "select", "move": "move", "choice": "move"}
+
+
+def load_session(path):
+    """
+    Reads a recorded session, turning the squares of the computer moves back into tuples.
+    :param path: String
+    :return: Dict
+    """
+    with open(path) as file:
+        session = json.load(file)
+    for event in session["events"]:
+        if event[0] == "computer":
+            event[1:3] = [tuple(event[1]), tuple(event[2])]
+    return session
+
+
+def reset_caches():
+    """
+    Empties the position cache, the scaled sprites and the pre-rendered board, so every replay starts cold.
+    :return: None
+    """
+    gpl.position_cache.clear()
+    gui.scaled_sprites.clear()
+    gui.rendered["background"] = None
+    gui.invalidate_chessboard()
+
+
+def replay(session, timings):
+    """
+    Plays the recorded events of a session on a new game and adds the measured times in seconds to the timings.
+    The window is resized as it was while recording, so the clicks hit the same squares.
+    :param session: Dict
+    :param timings: Dict of lists: "select", "move" and "frame"
+    :return: String, the end result or an empty string
+    """
+    win = pygame.display.set_mode(session["size"])
+    gui.load_sprites()
+    reset_caches()
+    state = chess.new_game()
+    chessboard = brd.Chessboard()
+    gpl.populate_chessboard(chessboard)
+    gui.draw_chessboard(win, chessboard)
+
+    for event in session["events"]:
+        start = time.perf_counter()
+        kind = None
+        if event[0] == "click":
+            kind = LATENCY_KINDS.get(chess.click_square(chessboard, state, gui.get_clicked_square(event[1:3])))
+        elif event[0] == "resize":
+            win = pygame.display.set_mode(event[1:3])
+            gui.invalidate_chessboard()
+        elif event[0] == "computer":
+            gpl.clear_selection_highlight(chessboard)
+            gpl.make_move(chessboard, mv.Move(*event[1:]))
+            state["redo_moves"].clear()
+            chess.end_turn(chessboard, state)
+        else:
+            gpl.clear_selection_highlight(chessboard)
+            step = chess.undo_move if event[0] == "undo" else chess.redo_move
+            state["team"] = step(chessboard, state["team"], session["computer"], state["redo_moves"])
+
+        frame = time.perf_counter()
+        gui.draw_chessboard(win, chessboard)
+        end = time.perf_counter()
+        timings["frame"].append(end - frame)
+        if kind is not None:
+            timings[kind].append(end - start)
+    return state["end"]
+
+
+def print_timings(timings):
+    """
+    Prints the count and the percentiles of every kind of timing in milliseconds.
+    :param timings: Dict
+    :return: None
+    """
+    print("{:8s} {:>7s} {:>9s} {:>9s} {:>9s} {:>9s}".format("", "count", "p50 ms", "p90 ms", "p99 ms", "max ms"))
+    for name, samples in timings.items():
+        ordered = sorted(samples) or [0.0]
+        print("{:8s} {:7d} {:9.3f} {:9.3f} {:9.3f} {:9.3f}".format(
+            name, len(samples), *[profiling.percentile(ordered, fraction) * 1000 for fraction in [0.5, 0.9, 0.99, 1]]
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("session", help="JSON file recorded with chess.py --record")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times the session is played")
+    parser.add_argument("--profile", metavar="FILE", help="also write the statistics of the hot functions to FILE")
+    args = parser.parse_args()
+
+    session = load_session(args.session)
+    if args.profile:
+        profiling.instrument(gpl)
+        profiling.instrument(gui)
+    pygame.init()
+    timings = {"select": [], "move": [], "frame": []}
+    for _ in range(args.repeat):
+        end = replay(session, timings)
+    print("{} events replayed {} times, result: {}".format(len(session["events"]), args.repeat, end or "none"))
+    print_timings(timings)
+    if args.profile:
+        profiling.dump(args.profile)
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
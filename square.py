@@ -1,43 +1,87 @@
 """
 Definition of a single square field on the board.
+The move highlight flags of all squares of a board are packed into one bytearray, one bitmask byte per square.
 """
 
 
+SELECTED_PIECE = 1
+REGULAR_MOVE = 2
+EAT_MOVE = 4
+SPECIAL_MOVE = 8
+CASTLE_MOVE = 16
+PROMOTION_MOVE = 32
+ENPASSANT_MOVE = 64
+DOUBLE_MOVE = 128
+
+
+def flag_property(bit):
+    """
+    Creates a boolean attribute stored as a bit of the square's byte in the flags of the board.
+    :param bit: Integer
+    :return: property
+    """
+    def get_flag(self):
+        return bool(self.flags[self.index] & bit)
+
+    def set_flag(self, value):
+        if value:
+            self.flags[self.index] |= bit
+        else:
+            self.flags[self.index] &= ~bit
+
+    return property(get_flag, set_flag)
+
+
 class Square:
     """
     General definition for a single square field.
     Contains information about the visual attributes of the square such as: position of the square on the field,
     dimensions of the square and color of the square. Also contains information about the piece on top of the
-    square, a temporary piece cache as well as flags indicating move availability for pieces on the board.
+    square as well as flags indicating move availability for pieces on the board.
+    The move flags live in the flags bytearray shared by all squares of a board, so they can be cleared at once.
     """
-    def __init__(self, row, col, width, color, piece):
+    __slots__ = (
+        "row", "col", "width", "color", "piece", "flags", "index", "promotion_in_progress", "former_move"
+    )
+
+    def __init__(self, row, col, width, color, piece, flags=None):
         """
         :param row: Integer
         :param col: Integer
         :param width: Integer
         :param color: Tuple
         :param piece: piece.Piece
+        :param flags: Bytearray of the board's move flags, a private one when not given
         """
         self.row = row
         self.col = col
         self.width = width
-        self.x = self.row * self.width
-        self.y = self.col * self.width
-        self.rect = (self.x, self.y, self.width, self.width)
         self.color = color
 
         self.piece = piece
-        self.piece_cache = None
 
-        self.selected_piece = False
+        self.flags = flags if flags is not None else bytearray(64)
+        self.index = row * 8 + col
         self.promotion_in_progress = False
-        self.check_in_progress = False
-
-        self.regular_move = False
         self.former_move = False
-        self.eat_move = False
-        self.special_move = False
-        self.castle_move = False
-        self.promotion_move = False
-        self.enpassant_move = False
-        self.double_move = False
+
+    @property
+    def x(self):
+        return self.row * self.width
+
+    @property
+    def y(self):
+        return self.col * self.width
+
+    @property
+    def rect(self):
+        return self.x, self.y, self.width, self.width
+
+    selected_piece = flag_property(SELECTED_PIECE)
+    regular_move = flag_property(REGULAR_MOVE)
+    eat_move = flag_property(EAT_MOVE)
+    special_move = flag_property(SPECIAL_MOVE)
+    castle_move = flag_property(CASTLE_MOVE)
+    promotion_move = flag_property(PROMOTION_MOVE)
+    enpassant_move = flag_property(ENPASSANT_MOVE)
+    double_move = flag_property(DOUBLE_MOVE)
@@ -0,0 +1,71 @@
+"""
+Tests of the bitboard backend against the published perft counts and the chessboard dictionary rules.
+"""
+
+
+import unittest
+import bitboard
+import fen
+import gameplay as gpl
+import perft
+
+
+def load_position(record):
+    """
+    Builds a bitboard position from a FEN record.
+    :param record: String
+    :return: bitboard.Position
+    """
+    chessboard, team = fen.load_fen(record)
+    return bitboard.from_chessboard(chessboard, team)
+
+
+def enpassant_moves(position):
+    """
+    Returns the en passant captures among the legal moves of a position.
+    :param position: bitboard.Position
+    :return: List
+    """
+    return [move for move in position.generate_legal_moves() if bitboard.decode_move(move)[2] == "enpassant_move"]
+
+
+class PerftTest(unittest.TestCase):
+    def test_published_counts(self):
+        for name, entry in perft.POSITIONS.items():
+            position = load_position(entry["fen"])
+            for depth, expected in enumerate(entry["expected"][:3], 1):
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(position.perft(depth), expected)
+
+    def test_same_moves_as_the_chessboard_dictionary(self):
+        for entry in perft.POSITIONS.values():
+            chessboard, team = fen.load_fen(entry["fen"])
+            moves = {
+                (bitboard.index_square(source), bitboard.index_square(destination), kind, promotion)
+                for source, destination, kind, promotion in map(
+                    bitboard.decode_move, bitboard.from_chessboard(chessboard, team).generate_legal_moves()
+                )
+            }
+            expected = {
+                (move.source, move.destination, move.kind, move.promotion)
+                for move in gpl.generate_legal_moves(chessboard, team)
+            }
+            self.assertEqual(moves, expected)
+
+
+class EnpassantTest(unittest.TestCase):
+    def test_capture(self):
+        self.assertEqual(len(enpassant_moves(load_position("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2"))), 1)
+
+    def test_capture_that_uncovers_a_rook_on_the_rank(self):
+        self.assertEqual(enpassant_moves(load_position("8/8/8/KPp4r/8/8/8/7k w - c6 0 1")), [])
+
+    def test_capture_of_the_checking_pawn(self):
+        self.assertEqual(len(enpassant_moves(load_position("8/8/8/2k5/3Pp3/8/8/4K3 b - d3 0 1"))), 1)
+
+    def test_capture_that_does_not_stop_a_check(self):
+        self.assertEqual(enpassant_moves(load_position("4k3/8/8/3pP3/8/8/8/r3K3 w - d6 0 2")), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests of the draw rules and of the position hashes they compare.
+"""
+
+
+import unittest
+import fen
+import gameplay as gpl
+import pgn
+
+
+def play(sans, record=fen.STARTING_FEN):
+    """
+    Plays SAN moves from a FEN record and returns the chessboard.
+    :param sans: List
+    :param record: String
+    :return: board.Chessboard
+    """
+    chessboard, team = fen.load_fen(record)
+    for san in sans:
+        gpl.make_move(chessboard, pgn.resolve_san(chessboard, team, san))
+        team = gpl.switch_active_team(team)
+    return chessboard
+
+
+class EnpassantHashTest(unittest.TestCase):
+    def test_double_move_that_can_not_be_taken(self):
+        record = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+        self.assertEqual(play(["e4"]).hash, fen.load_fen(record)[0].hash)
+
+    def test_double_move_that_can_be_taken(self):
+        chessboard = play(["d5"], "4k3/3p4/8/4P3/8/8/8/4K3 b - - 0 1")
+        self.assertNotEqual(chessboard.hash, fen.load_fen("4k3/8/8/3pP3/8/8/8/4K3 w - - 0 2")[0].hash)
+        self.assertEqual(chessboard.hash, fen.load_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2")[0].hash)
+
+    def test_en_passant_capture_that_uncovers_a_check(self):
+        pinned = fen.load_fen("8/8/8/KPp4r/8/8/8/7k w - c6 0 1")[0]
+        self.assertEqual(pinned.hash, fen.load_fen("8/8/8/KPp4r/8/8/8/7k w - - 0 1")[0].hash)
+
+    def test_unmake_restores_the_en_passant_key(self):
+        chessboard = play(["d5"], "4k3/3p4/8/4P3/8/8/8/4K3 b - - 0 1")
+        hash_ = chessboard.hash
+        gpl.make_move(chessboard, pgn.resolve_san(chessboard, "w", "Kd2"))
+        gpl.unmake_move(chessboard)
+        self.assertEqual(chessboard.hash, hash_)
+        self.assertEqual(chessboard.enpassant_key, fen.load_fen(fen.to_fen(chessboard, "w"))[0].enpassant_key)
+
+
+class RepetitionTest(unittest.TestCase):
+    def test_repetition_after_a_double_move(self):
+        chessboard = play(["e4", "Nf6", "Nf3", "Ng8", "Ng1", "Nf6", "Nf3", "Ng8"])
+        self.assertFalse(gpl.is_draw(chessboard))
+        gpl.make_move(chessboard, pgn.resolve_san(chessboard, "w", "Ng1"))
+        self.assertEqual(gpl.is_draw(chessboard), "repetition")
+
+    def test_fifty_moves(self):
+        chessboard = play(["Ra2", "Kc6"], "8/8/3k4/8/8/3K4/8/R7 w - - 98 80")
+        self.assertEqual(gpl.is_draw(chessboard), "fifty_moves")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests of the position cache of legal moves.
+"""
+
+
+import unittest
+import cache
+import fen
+import gameplay as gpl
+
+
+# Legal position with more moves than fit into a cache slot.
+CROWDED_FEN = "k7/2QQQQQQ/1Q5Q/1Q5Q/1Q5Q/1Q5Q/1Q5Q/1QQQQQQK w - - 0 1"
+
+
+class PositionCacheTest(unittest.TestCase):
+    def test_position_with_more_moves_than_a_slot(self):
+        chessboard, team = fen.load_fen(CROWDED_FEN)
+        moves = gpl.generate_legal_moves(chessboard, team)
+        self.assertEqual(len(moves), 229)
+
+        other_chessboard, other_team = fen.load_fen(fen.STARTING_FEN)
+        other_moves = gpl.generate_legal_moves(other_chessboard, other_team)
+        position_cache = cache.PositionCache(2)
+        position_cache.put(2, other_moves, False)
+        size = len(position_cache.moves)
+        position_cache.put(1, moves, False)
+
+        self.assertIsNone(position_cache.get(1))
+        self.assertEqual(position_cache.get(2), (other_moves, False))
+        self.assertEqual(len(position_cache.moves), size)
+
+    def test_legal_moves_of_a_crowded_position_through_the_cache(self):
+        chessboard, team = fen.load_fen(CROWDED_FEN)
+        gpl.position_cache.clear()
+        first, _ = gpl.get_legal_moves(chessboard, team)
+        second, _ = gpl.get_legal_moves(chessboard, team)
+        self.assertEqual(len(first), 229)
+        self.assertEqual(sorted(first), sorted(second))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        chessboard, team = fen.load_fen(fen.STARTING_FEN)
+        moves = gpl.generate_legal_moves(chessboard, team)
+        position_cache = cache.PositionCache(3)
+        for key in [1, 2, 3]:
+            position_cache.put(key, moves, False)
+        position_cache.get(1)
+        position_cache.put(2, moves, True)
+        position_cache.put(4, moves, False)
+
+        self.assertIsNone(position_cache.get(3))
+        self.assertEqual(position_cache.get(2), (moves, True))
+        self.assertEqual(position_cache.get(1), (moves, False))
+        self.assertEqual(position_cache.statistics()["evictions"], 1)
+
+    def test_move_storage_grows_with_the_entries(self):
+        chessboard, team = fen.load_fen(fen.STARTING_FEN)
+        moves = gpl.generate_legal_moves(chessboard, team)
+        position_cache = cache.PositionCache(4)
+        self.assertEqual(len(position_cache.moves), 0)
+        position_cache.put(1, moves, False)
+        position_cache.put(2, moves, False)
+        self.assertEqual(len(position_cache.moves), 2 * cache.MAX_MOVES)
+
+        position_cache.clear()
+        position_cache.put(3, moves, False)
+        self.assertEqual(len(position_cache.moves), 2 * cache.MAX_MOVES)
+        self.assertEqual(position_cache.get(3), (moves, False))
+        self.assertIsNone(position_cache.get(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Tests of the piece choice gui shown while a pawn is promoted.
+"""
+
+
+import unittest
+import fen
+import gameplay as gpl
+import graphics as gui
+import move as mv
+
+
+# Team: FEN with a pawn of the team about to promote on the b file, the promotion move and the expected field.
+PROMOTIONS = {
+    "w": ("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", mv.Move((1, 1), (1, 0), "promotion_move"), (1, 0)),
+    "b": ("4k3/8/8/8/8/8/1p6/4K3 b - - 0 1", mv.Move((1, 6), (1, 7), "promotion_move"), (1, 7))
+}
+
+
+class PromotionDisplayTest(unittest.TestCase):
+    def test_every_choice_of_both_teams(self):
+        for team, (record, move, promotion_field) in PROMOTIONS.items():
+            for choice in ["queen", "bishop", "knight", "rook"]:
+                with self.subTest(team=team, choice=choice):
+                    chessboard, _ = fen.load_fen(record)
+                    gpl.make_move(chessboard, move)
+                    covered = {square: chessboard[square].piece for square in chessboard}
+                    gui.set_promotion_display(chessboard, move.destination)
+
+                    clicked = [
+                        square for square in chessboard
+                        if chessboard[square].promotion_in_progress and chessboard[square].piece.type_ == choice
+                    ]
+                    self.assertEqual(len(clicked), 1)
+                    self.assertEqual(gui.reset_promotion_display(chessboard, clicked[0]), (promotion_field, choice))
+                    self.assertEqual(gui.promotion_covered, {})
+                    for square, covered_piece in covered.items():
+                        self.assertIs(chessboard[square].piece, covered_piece)
+                        self.assertFalse(chessboard[square].promotion_in_progress)
+                        self.assertEqual(chessboard[square].former_move, square in chessboard.former_moves)
+
+                    gpl.do_promotion_resolve(chessboard, promotion_field, choice)
+                    self.assertEqual(chessboard[promotion_field].piece.type_, choice)
+                    self.assertEqual(chessboard[promotion_field].piece.team, team)
+
+
+if __name__ == '__main__':
+    unittest.main()
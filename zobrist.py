@@ -0,0 +1,64 @@
+"""
+Zobrist hashing of chessboard positions.
+The hash covers piece placement, the team to move, castling rights and the file of a pawn that can be taken en passant.
+The gameplay move functions update chessboard.hash incrementally, compute_hash builds it from scratch.
+"""
+
+
+import random
+
+
+TEAMS = ["w", "b"]
+TYPES = ["king", "queen", "rook", "bishop", "knight", "pawn"]
+
+# Castling right: (king square, rook square)
+CASTLING_SQUARES = [((4, 7), (7, 7)), ((4, 7), (0, 7)), ((4, 0), (7, 0)), ((4, 0), (0, 0))]
+
+_generator = random.Random(20230117)
+PIECE_KEYS = {
+    (team, type_, (row, col)): _generator.getrandbits(64)
+    for team in TEAMS for type_ in TYPES for row in range(8) for col in range(8)
+}
+SIDE_KEY = _generator.getrandbits(64)
+CASTLING_KEYS = [_generator.getrandbits(64) for _ in range(16)]
+ENPASSANT_KEYS = [_generator.getrandbits(64) for _ in range(8)]
+# Not part of the position hash, marks which team a cached position query was made for.
+QUERY_KEYS = {team: _generator.getrandbits(64) for team in TEAMS}
+
+
+def castling_rights(chessboard):
+    """
+    Returns the castling rights as a 4 bit number, one bit per king and rook pair that have not moved.
+    :param chessboard: Dict
+    :return: Integer
+    """
+    rights = 0
+    for bit, (king, rook) in enumerate(CASTLING_SQUARES):
+        king_piece = chessboard[king].piece
+        rook_piece = chessboard[rook].piece
+        if (
+                king_piece is not None and king_piece.type_ == "king" and not king_piece.moved and
+                rook_piece is not None and rook_piece.type_ == "rook" and not rook_piece.moved and
+                king_piece.team == rook_piece.team
+        ):
+            rights |= 1 << bit
+    return rights
+
+
+def compute_hash(chessboard, team):
+    """
+    Computes the hash of a position from scratch.
+    The en passant file is hashed through chessboard.enpassant_key, which the rules set only while the pawn can
+    legally be taken, see gameplay.get_enpassant_key.
+    :param chessboard: board.Chessboard
+    :param team: String
+    :return: Integer
+    """
+    hash_ = 0
+    for squares in chessboard.pieces.values():
+        for square in squares:
+            placed_piece = chessboard[square].piece
+            hash_ ^= PIECE_KEYS[placed_piece.team, placed_piece.type_, square]
+    if team == "b":
+        hash_ ^= SIDE_KEY
+    return hash_ ^ chessboard.enpassant_key ^ CASTLING_KEYS[castling_rights(chessboard)]